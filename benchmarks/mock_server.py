@@ -0,0 +1,305 @@
+"""Local stand-in for the parts of the GitHub REST API that github-reports uses.
+
+Serves synthetic (or replayed) issues, pull requests, commits, labels and
+organization repositories for any owner/repo, with the behaviour the fetch
+code depends on: per_page/page pagination with Link headers, ETags and 304
+Not Modified, X-RateLimit-* headers (403 once the budget is spent), the
+since/until/state/sort filters, search total_count, and injected latency.
+GraphQL is not served.
+
+    python benchmarks/mock_server.py --port 8765 --issues 20000 --latency 50
+    github-reports --api-url http://127.0.0.1:8765 --cache-path /tmp/mock-cache.sqlite3 \\
+        burndown --repo mock/big --token anything
+
+Synthetic data is deterministic per repo name. With --replay DIR, a repo's
+listings are read from DIR/<owner>/<repo>/{issues,pulls,commits,labels}.json
+(raw GitHub API responses, concatenated into one JSON array) when present.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlparse
+import zlib
+
+LABELS = ['bug', 'enhancement', 'documentation', 'question', 'good first issue', 'performance', 'security', 'ui']
+AUTHORS = [f'dev{i:02d}' for i in range(40)]
+MILESTONES = [None, None, 'v1.0', 'v1.1', 'v2.0']
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+
+class MockGitHub(ThreadingHTTPServer):
+    """The server; options are the scale, latency and rate-limit settings (see main)."""
+
+    daemon_threads = True
+
+    def __init__(self, address, issues=2000, prs=1000, commits=3000, years=3, latency=0.0,
+                 rate_limit=5000, search_rate_limit=30, reset_seconds=3600, org_repos=3, replay=None, seed=0):
+        super().__init__(address, _Handler)
+        self.options = dict(issues=issues, prs=prs, commits=commits, years=years, org_repos=org_repos, seed=seed)
+        self.latency = latency
+        self.replay = replay
+        self.limits = {'core': rate_limit, 'search': search_rate_limit}
+        # GitHub's search budget is per minute, the core one per hour.
+        self.windows = {'core': reset_seconds, 'search': 60}
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self._lock = threading.Lock()
+        self._datasets = {}
+        self._budgets = {}
+        self.stats = {'requests': 0, 'not_modified': 0, 'rate_limited': 0, 'bytes': 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def dataset(self, repo):
+        """Return the listings of a repo, generating (or loading) them on first use."""
+        with self._lock:
+            if repo not in self._datasets:
+                self._datasets[repo] = self._load(repo) or _synthesize(repo, self.now, **self.options)
+            return self._datasets[repo]
+
+    def take(self, resource):
+        """Spend one request of a resource's budget; return (limit, remaining, reset) or None if spent."""
+        with self._lock:
+            now = time.time()
+            budget = self._budgets.get(resource)
+            if budget is None or budget[1] <= now:
+                budget = self._budgets[resource] = [self.limits[resource], int(now) + self.windows[resource]]
+            if budget[0] <= 0:
+                return None
+            budget[0] -= 1
+            return self.limits[resource], budget[0], budget[1]
+
+    def budget(self, resource):
+        with self._lock:
+            remaining, reset = self._budgets.get(resource, [self.limits[resource], int(time.time()) + self.windows[resource]])
+            return self.limits[resource], remaining, reset
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _load(self, repo):
+        if not self.replay:
+            return None
+        directory = os.path.join(self.replay, *repo.split('/'))
+        if not os.path.isdir(directory):
+            return None
+        dataset = {}
+        for name in ('issues', 'pulls', 'commits', 'labels'):
+            path = os.path.join(directory, f'{name}.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    dataset[name] = json.load(f)
+            else:
+                dataset[name] = []
+        return dataset
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'MockGitHub/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self._send(400, {'message': 'GraphQL is not supported by the mock server; use --api rest.'})
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parsed = urlparse(self.path)
+        query = dict(parse_qsl(parsed.query))
+        parts = parsed.path.strip('/').split('/')
+        resource = 'search' if parts[0] == 'search' else 'core'
+        limit = self.server.take(resource)
+        if limit is None:
+            self.server.count('rate_limited')
+            return self._send(403, {'message': 'API rate limit exceeded'}, rate=self.server.budget(resource) + (resource,))
+        rate = limit + (resource,)
+        if parts[0] == 'repos' and len(parts) == 4:
+            items = self._listing('/'.join(parts[1:3]), parts[3], query)
+        elif parts[0] == 'orgs' and len(parts) == 3 and parts[2] == 'repos':
+            items = [{'full_name': f'{parts[1]}/repo-{i}'} for i in range(self.server.options['org_repos'])]
+        elif parts[:2] == ['search', 'issues']:
+            return self._send(200, self._search(query.get('q', '')), rate=rate)
+        else:
+            items = None
+        if items is None:
+            return self._send(404, {'message': 'Not Found'}, rate=rate)
+        per_page = min(int(query.get('per_page', DEFAULT_PER_PAGE)), MAX_PER_PAGE)
+        page = int(query.get('page', 1))
+        last = max(1, -(-len(items) // per_page))
+        body = items[(page - 1) * per_page:page * per_page]
+        self._send(200, body, rate=rate, links=self._links(parsed.path, query, page, last))
+
+    def _listing(self, repo, kind, query):
+        if kind not in ('issues', 'pulls', 'commits', 'labels'):
+            return None
+        items = self.server.dataset(repo)[kind]
+        if kind == 'labels':
+            return items
+        if kind == 'commits':
+            since, until = query.get('since'), query.get('until')
+            return [c for c in items
+                    if (not since or c['commit']['committer']['date'] >= since)
+                    and (not until or c['commit']['committer']['date'] <= until)]
+        state = query.get('state', 'open')
+        if state != 'all':
+            items = [item for item in items if item['state'] == state]
+        if query.get('since'):
+            items = [item for item in items if item['updated_at'] >= query['since']]
+        field = 'updated_at' if query.get('sort') == 'updated' else 'created_at'
+        return sorted(items, key=lambda item: item[field], reverse=query.get('direction', 'desc') == 'desc')
+
+    def _search(self, q):
+        terms = dict(re.findall(r'(\w+):("[^"]*"|\S+)', q))
+        repo = terms.get('repo')
+        items = [i for i in self.server.dataset(repo)['issues'] if 'pull_request' not in i] if repo else []
+        if 'state' in terms:
+            items = [i for i in items if i['state'] == terms['state']]
+        if 'label' in terms:
+            label = terms['label'].strip('"')
+            items = [i for i in items if any(l['name'] == label for l in i['labels'])]
+        if 'created' in terms:
+            start, _, end = terms['created'].partition('..')
+            items = [i for i in items if (start == '*' or i['created_at'][:10] >= start) and (end in ('*', '') or i['created_at'][:10] <= end)]
+        return {'total_count': len(items), 'incomplete_results': False, 'items': items[:1]}
+
+    def _links(self, path, query, page, last):
+        base = f'http://{self.headers.get("Host", "%s:%s" % self.server.server_address[:2])}{path}'
+        rels = {'first': 1, 'last': last}
+        if page > 1:
+            rels['prev'] = page - 1
+        if page < last:
+            rels['next'] = page + 1
+        return ', '.join(f'<{base}?{urlencode(dict(query, page=n))}>; rel="{rel}"' for rel, n in rels.items())
+
+    def _send(self, status, payload, rate=None, links=None):
+        body = json.dumps(payload).encode()
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.server.count('not_modified')
+            status, body = 304, b''
+        self.server.count('requests')
+        self.server.count('bytes', len(body))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status in (200, 304):
+            self.send_header('ETag', etag)
+        if links:
+            self.send_header('Link', links)
+        if rate:
+            limit, remaining, reset, resource = rate
+            self.send_header('X-RateLimit-Limit', str(limit))
+            self.send_header('X-RateLimit-Remaining', str(remaining))
+            self.send_header('X-RateLimit-Reset', str(reset))
+            self.send_header('X-RateLimit-Resource', resource)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _synthesize(repo, now, issues, prs, commits, years, seed, **_):
+    """Generate a repo's issues (with its pull requests mixed in, as GitHub lists them), pulls, commits and labels."""
+    rng = random.Random(zlib.crc32(repo.encode()) + seed)
+    span = int(years * 365 * 86400)
+    start = now - timedelta(seconds=span)
+
+    def moment(offset):
+        return start + timedelta(seconds=offset)
+
+    def iso(moment):
+        return moment.strftime('%Y-%m-%dT%H:%M:%SZ') if moment else None
+
+    def lifecycle():
+        created = moment(rng.randint(0, span))
+        closed = None
+        if rng.random() < 0.75:
+            closed = min(created + timedelta(seconds=int(rng.expovariate(1 / (14 * 86400)))), now)
+        updated = closed or min(created + timedelta(seconds=rng.randint(0, 30 * 86400)), now)
+        return created, updated, closed
+
+    pulls = []
+    for number in range(1, prs + 1):
+        created, updated, closed = lifecycle()
+        merged = closed if closed and rng.random() < 0.8 else None
+        pulls.append({
+            'id': 2_000_000 + number, 'number': number, 'state': 'closed' if closed else 'open',
+            'created_at': iso(created), 'updated_at': iso(updated), 'closed_at': iso(closed), 'merged_at': iso(merged),
+        })
+    listing = []
+    for number in range(1, issues + 1):
+        created, updated, closed = lifecycle()
+        milestone = rng.choice(MILESTONES)
+        listing.append({
+            'id': 1_000_000 + number, 'number': number, 'state': 'closed' if closed else 'open',
+            'created_at': iso(created), 'updated_at': iso(updated), 'closed_at': iso(closed),
+            'labels': [{'name': name} for name in rng.sample(LABELS, rng.choice((0, 1, 1, 2, 3)))],
+            'milestone': {'title': milestone} if milestone else None,
+        })
+    for pr in pulls:
+        listing.append(dict(pr, labels=[], milestone=None, pull_request={}))
+    listing.sort(key=lambda item: item['created_at'], reverse=True)
+    pulls.sort(key=lambda pr: pr['created_at'], reverse=True)
+    history = []
+    for _ in range(commits):
+        authored = moment(rng.randint(0, span))
+        committed = min(authored + timedelta(seconds=rng.randint(0, 3 * 86400)), now)
+        history.append({
+            'sha': '%040x' % rng.getrandbits(160),
+            'commit': {
+                'author': {'name': rng.choice(AUTHORS), 'date': iso(authored)},
+                'committer': {'date': iso(committed)},
+            },
+        })
+    history.sort(key=lambda c: c['commit']['committer']['date'], reverse=True)
+    return {'issues': listing, 'pulls': pulls, 'commits': history, 'labels': [{'name': name} for name in LABELS]}
+
+
+def start(host='127.0.0.1', port=0, **options):
+    """Start a MockGitHub on a background thread and return it; stop it with shutdown()."""
+    server = MockGitHub((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--issues', type=int, default=2000, help='issues per repo (default: 2000)')
+    parser.add_argument('--prs', type=int, default=1000, help='pull requests per repo (default: 1000)')
+    parser.add_argument('--commits', type=int, default=3000, help='commits per repo (default: 3000)')
+    parser.add_argument('--years', type=float, default=3, help='history the items are spread over (default: 3)')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every response')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='core requests per window (default: 5000)')
+    parser.add_argument('--search-rate-limit', type=int, default=30, help='search requests per minute (default: 30)')
+    parser.add_argument('--reset-seconds', type=int, default=3600, help='core rate-limit window (default: 3600)')
+    parser.add_argument('--org-repos', type=int, default=3, help='repositories listed for any organization (default: 3)')
+    parser.add_argument('--replay', default=None, help='directory of recorded listings to serve instead of synthetic data')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    server = MockGitHub(
+        (args.host, args.port), issues=args.issues, prs=args.prs, commits=args.commits, years=args.years,
+        latency=args.latency / 1000, rate_limit=args.rate_limit, search_rate_limit=args.search_rate_limit,
+        reset_seconds=args.reset_seconds, org_repos=args.org_repos, replay=args.replay, seed=args.seed,
+    )
+    print(f'Mock GitHub API on {server.url} (Ctrl-C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Cold-start benchmark for the github-reports CLI.
+
+Runs a few commands that never touch the network in fresh processes and
+reports the wall time of each, for the source tree and (if it has been
+built with ./publish.sh) the frozen binary in dist/.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --binary dist/github-reports
+    python benchmarks/startup.py --importtime   # top imports of `--help`
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'github_reports', 'cli.py')
+
+# Invocations that exit before any GitHub request is made.
+CASES = [
+    ('--help', ['--help']),
+    ('command --help', ['burndown', '--help']),
+    ('usage error', ['burndown']),
+]
+
+
+def time_command(argv, runs):
+    """Return the wall times (seconds) of running argv in a fresh process runs times."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(label, times):
+    print(f'  {label:<18} min {min(times) * 1000:7.1f} ms   median {statistics.median(times) * 1000:7.1f} ms')
+
+
+def print_importtime(top):
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI, '--help'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only top-level imports (one space of indent), so nested modules are not double counted.
+        if name.startswith('  '):
+            continue
+        rows.append((int(cumulative), name.strip()))
+    print("Slowest top-level imports of `cli.py --help`:")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f'  {cumulative / 1000:7.1f} ms  {name}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='runs per case (default: 10)')
+    parser.add_argument('--binary', default=os.path.join(ROOT, 'dist', 'github-reports'),
+                        help='frozen binary to time as well, if it exists')
+    parser.add_argument('--importtime', action='store_true', help='also list the slowest imports')
+    args = parser.parse_args()
+
+    targets = [('source', [sys.executable, CLI])]
+    if os.path.exists(args.binary):
+        targets.append(('binary', [args.binary]))
+    else:
+        print(f'(no binary at {args.binary}; run ./publish.sh to include it)')
+
+    for target, prefix in targets:
+        print(f'{target}: {" ".join(prefix)}')
+        for label, argv in CASES:
+            report(label, time_command(prefix + argv, args.runs))
+    if args.importtime:
+        print_importtime(10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""End-to-end benchmark suite run against the local mock GitHub API.
+
+Starts benchmarks/mock_server.py in-process, points github_api at it with a
+throwaway cache, and times each stage of a report run:
+
+- fetch: cold fetches (items/s, requests, bytes)
+- cache hit: the same fetches again, served from the SQLite cache
+- revalidate: the listings walked again with ETags, all pages 304
+- aggregate: each report's data function on the fetched items
+- render: each chart drawn to a PNG
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --issues 50000 --prs 20000 --commits 50000 --latency 20
+    python benchmarks/suite.py --json results.json --skip-render
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'github_reports'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache_utils  # noqa: E402
+import github_api  # noqa: E402
+import mock_server  # noqa: E402
+
+TOKEN = 'mock-token'
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def best_of(runs, fn, *args):
+    return min(timed(fn, *args)[0] for _ in range(runs))
+
+
+def run_fetches(server, repos, since):
+    """Run the three dataset fetches; return {dataset: (seconds, items, requests, bytes, 304s)} and the data."""
+    fetches = {
+        'issues': lambda: github_api.fetch_all_issues_multi(repos, TOKEN),
+        'prs': lambda: github_api.fetch_pull_requests_multi(repos, TOKEN),
+        'commits': lambda: github_api.fetch_commits_multi(repos, TOKEN, since),
+    }
+    return _measure(server, fetches)
+
+
+def run_revalidation(server, repos, since):
+    """Walk every listing again without the whole-result cache, so each page is revalidated by ETag."""
+    start = github_api.iso(since)
+    fetches = {
+        'issues': lambda: [i for r in repos for i in github_api.fetch_issues_updated_since(r, TOKEN)],
+        'prs': lambda: [p for r in repos for p in github_api.fetch_pull_requests_updated_since(r, TOKEN)],
+        'commits': lambda: [c for r in repos for c in github_api.fetch_commits_between(r, TOKEN, start)],
+    }
+    return _measure(server, fetches)
+
+
+def _measure(server, fetches):
+    results, data = {}, {}
+    for name, fetch in fetches.items():
+        before = dict(server.stats)
+        seconds, items = timed(fetch)
+        after = server.stats
+        data[name] = items
+        results[name] = {
+            'seconds': seconds,
+            'items': len(items),
+            'items_per_second': len(items) / seconds if seconds else None,
+            'requests': after['requests'] - before['requests'],
+            'bytes': after['bytes'] - before['bytes'],
+            'not_modified': after['not_modified'] - before['not_modified'],
+        }
+    return results, data
+
+
+def run_aggregations(data, runs):
+    import utils
+    cases = {
+        'burndown': (utils.burndown_data_from_issues, data['issues']),
+        'issue-type-breakdown': (utils.issue_type_breakdown_data, data['issues']),
+        'issue-resolution-time': (utils.issue_resolution_time_data, data['issues']),
+        'pr-activity-timeline': (utils.pr_activity_timeline_data, data['prs']),
+        'commit-summary': (utils.commit_summary_weekly_data, data['commits']),
+    }
+    return {name: {'seconds': best_of(runs, fn, items)} for name, (fn, items) in cases.items()}
+
+
+def run_renders(data, directory):
+    import utils
+    burndown = utils.burndown_data_from_issues(data['issues'])
+    cases = {
+        'burndown': lambda out: utils.plot_burndown(*burndown, out),
+        'issue-type-breakdown': lambda out: utils.plot_issue_type_breakdown(utils.issue_type_breakdown_data(data['issues']), out),
+        'issue-resolution-time': lambda out: utils.plot_issue_resolution_time(utils.issue_resolution_time_data(data['issues']), out),
+        'pr-activity-timeline': lambda out: utils.plot_pr_activity_timeline(*utils.pr_activity_timeline_data(data['prs']), out),
+        'commit-summary': lambda out: utils.plot_commit_summary_weekly(*utils.commit_summary_weekly_data(data['commits']), out),
+    }
+    # The first chart also pays for importing matplotlib; time that separately.
+    import render
+    results = {'matplotlib import': {'seconds': timed(render.pyplot)[0]}}
+    for name, plot in cases.items():
+        results[name] = {'seconds': timed(plot, os.path.join(directory, f'{name}.png'))[0]}
+    return results
+
+
+def print_table(title, results):
+    print(title)
+    for name, row in results.items():
+        line = f'  {name:<24} {row["seconds"] * 1000:9.1f} ms'
+        if 'items' in row:
+            rate = row['items_per_second']
+            line += f'  {row["items"]:>7} items  {rate or 0:>10.0f} items/s  {row["requests"]:>5} req'
+            line += f'  {row["bytes"] / 1e6:7.2f} MB  {row["not_modified"]:>5} x 304'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repos', type=int, default=1, help='repositories fetched together (default: 1)')
+    parser.add_argument('--issues', type=int, default=5000, help='issues per repo (default: 5000)')
+    parser.add_argument('--prs', type=int, default=2000, help='pull requests per repo (default: 2000)')
+    parser.add_argument('--commits', type=int, default=5000, help='commits per repo (default: 5000)')
+    parser.add_argument('--months', type=int, default=36, help='commit window in months (default: 36)')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds of latency per mock response')
+    parser.add_argument('--runs', type=int, default=3, help='runs per aggregation, best is reported (default: 3)')
+    parser.add_argument('--skip-render', action='store_true', help='do not time chart rendering')
+    parser.add_argument('--json', dest='json_path', default=None, help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    server = mock_server.start(issues=args.issues, prs=args.prs, commits=args.commits,
+                               latency=args.latency / 1000, rate_limit=10 ** 9)
+    repos = [f'mock/repo-{i}' for i in range(args.repos)]
+    since = github_api.months_ago(args.months)
+    results = {'settings': vars(args)}
+    with tempfile.TemporaryDirectory() as directory:
+        cache_utils.configure_cache(os.path.join(directory, 'cache.sqlite3'))
+        github_api.configure_api(server.url)
+        try:
+            results['fetch'], data = run_fetches(server, repos, since)
+            results['cache_hit'], _ = run_fetches(server, repos, since)
+            results['revalidate'], _ = run_revalidation(server, repos, since)
+            results['aggregate'] = run_aggregations(data, args.runs)
+            if not args.skip_render:
+                results['render'] = run_renders(data, directory)
+        finally:
+            server.shutdown()
+
+    print(f'mock: {args.repos} repo(s) x {args.issues} issues, {args.prs} PRs, {args.commits} commits, {args.latency:g} ms latency')
+    for section in ('fetch', 'cache_hit', 'revalidate', 'aggregate', 'render'):
+        if section in results:
+            print_table(section.replace('_', ' '), results[section])
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,13 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # matplotlib selects its backend by name at runtime
+    hiddenimports=['matplotlib.backends.backend_agg', 'matplotlib.backends.backend_svg'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Charts are only rendered headless; GUI toolkits only add size and unpack time.
+    excludes=['tkinter', 'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'wx', 'gi', 'IPython'],
     noarchive=False,
     optimize=0,
 )
@@ -1,32 +1,174 @@
 import os
 import pickle
-import hashlib
-from datetime import datetime, timezone
+import sqlite3
+import threading
+import time
+import zlib
+import metrics
 
-CACHE_DIR = os.path.join(os.path.dirname(__file__), '.cache')
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+# The cache is a single SQLite file. Entries are keyed by (repo, kind, page),
+# where kind is the entity type ('issues', 'pulls', ...) and page is the page
+# or other sub-key within it. Values are pickled and zlib-compressed, and the
+# least recently used entries are evicted once the file outgrows max_bytes.
+# Pinned entries (incrementally maintained state such as the sync stores, the
+# commit store and the rollups, which cannot be rebuilt from a single
+# response) are never evicted.
+# The API token is not part of the key, so a cache file can be shared.
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'github-reports',
+    'cache.sqlite3',
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Bumped whenever the shape of cached values changes; older entries are dropped.
+SCHEMA_VERSION = 8
 
-def _get_cache_path(key):
-    h = hashlib.sha256(key.encode('utf-8')).hexdigest()
-    return os.path.join(CACHE_DIR, h + '.pkl')
+_config = {
+    'path': os.environ.get('GITHUB_REPORTS_CACHE_PATH') or DEFAULT_CACHE_PATH,
+    'max_bytes': int(os.environ.get('GITHUB_REPORTS_CACHE_MAX_MB', 0)) * 1024 * 1024 or DEFAULT_MAX_BYTES,
+}
+_local = threading.local()
 
-def load_cache(key, max_age_seconds=3600):
-    path = _get_cache_path(key)
-    if not os.path.exists(path):
-        return None
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    page TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, kind, page)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (pinned, accessed);
+"""
+
+
+def configure_cache(path=None, max_bytes=None):
+    """Set the cache file location and/or its size cap in bytes."""
+    if path:
+        _config['path'] = os.path.expanduser(path)
+    if max_bytes:
+        _config['max_bytes'] = max_bytes
+
+
+def load_cache(repo, kind, page='', max_age_seconds=3600):
+    """Return the cached value for a key, or None if it is missing or older than max_age_seconds.
+
+    max_age_seconds=None keeps the entry until it is overwritten or evicted.
+    """
     try:
-        with open(path, 'rb') as f:
-            data = pickle.load(f)
-        timestamp = data.get('timestamp')
-        if not timestamp or (datetime.now(timezone.utc) - timestamp).total_seconds() > max_age_seconds:
+        conn = _connection()
+        row = conn.execute(
+            "SELECT value, created FROM entries WHERE repo = ? AND kind = ? AND page = ?",
+            (repo, kind, page),
+        ).fetchone()
+        if row is None:
+            metrics.count('cache.misses')
             return None
-        return data.get('value')
+        value, created = row
+        now = time.time()
+        if max_age_seconds is not None and now - created > max_age_seconds:
+            metrics.count('cache.misses')
+            return None
+        metrics.count('cache.hits')
+        conn.execute(
+            "UPDATE entries SET accessed = ? WHERE repo = ? AND kind = ? AND page = ?",
+            (now, repo, kind, page),
+        )
+        return pickle.loads(zlib.decompress(value))
     except Exception:
         return None
 
-def save_cache(key, value):
-    path = _get_cache_path(key)
-    data = {'timestamp': datetime.now(timezone.utc), 'value': value}
-    with open(path, 'wb') as f:
-        pickle.dump(data, f)
+
+def save_cache(repo, kind, value, page='', pinned=False):
+    """Store a value under a key, evicting least recently used entries if over the size cap.
+
+    pinned=True exempts the entry from eviction; it is kept until overwritten.
+    """
+    blob = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    now = time.time()
+    conn = _connection()
+    with _transaction(conn):
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (repo, kind, page, value, size, created, accessed, pinned) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (repo, kind, page, blob, len(blob), now, now, int(pinned)),
+        )
+        _evict(conn, _config['max_bytes'])
+
+
+def save_cache_entries(entries, pinned=False, check=None):
+    """Store several (repo, kind, page, value) entries in one transaction, so readers see all or none.
+
+    check, if given, is called with the database locked before anything is
+    written; when it returns False nothing is written. Returns whether the
+    entries were written.
+    """
+    blobs = [(repo, kind, page, zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+             for repo, kind, page, value in entries]
+    now = time.time()
+    conn = _connection()
+    with _transaction(conn):
+        if check is not None and not check():
+            return False
+        conn.executemany(
+            "INSERT OR REPLACE INTO entries (repo, kind, page, value, size, created, accessed, pinned) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(repo, kind, page, blob, len(blob), now, now, int(pinned)) for repo, kind, page, blob in blobs],
+        )
+        _evict(conn, _config['max_bytes'])
+    return True
+
+
+def _evict(conn, max_bytes):
+    """Delete least recently used unpinned entries until the stored payloads fit in max_bytes."""
+    excess = conn.execute("SELECT total(size) FROM entries").fetchone()[0] - max_bytes
+    if excess <= 0:
+        return
+    victims = []
+    for rowid, size in conn.execute("SELECT rowid, size FROM entries WHERE NOT pinned ORDER BY accessed"):
+        victims.append((rowid,))
+        excess -= size
+        if excess <= 0:
+            break
+    conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+
+
+class _transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent writers queue on the database lock."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _connection():
+    """Return this thread's connection to the configured cache file."""
+    path = _config['path']
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == path:
+        return conn
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Autocommit mode; writes that must be atomic use _transaction. The busy
+    # timeout makes other threads and processes wait for the lock instead of failing.
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _transaction(conn):
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The table itself may have changed shape, so it is recreated.
+            conn.execute("DROP TABLE IF EXISTS entries")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.executescript(_SCHEMA)
+    _local.conn = conn
+    _local.path = path
+    return conn
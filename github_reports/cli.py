@@ -1,11 +1,24 @@
 import click
-import utils
+import os
+import tomllib
+import cache_utils
+import render
 import github_api
-from datetime import datetime, timedelta, timezone
+import metrics
+import rollups
+# utils (numpy, matplotlib) is imported inside the commands that need it, so
+# --help and usage errors start quickly.
+from concurrent.futures import ThreadPoolExecutor
 
 
 @click.group()
-def main():
+@click.option('--cache-path', envvar='GITHUB_REPORTS_CACHE_PATH', default=None, help='Location of the SQLite cache file')
+@click.option('--cache-max-mb', envvar='GITHUB_REPORTS_CACHE_MAX_MB', type=int, default=None, help='Cache size cap in MB; least recently used entries are evicted')
+@click.option('--api-url', envvar='GITHUB_API_URL', default=None, help='Base URL of the GitHub API (default: https://api.github.com)')
+@click.option('--timings', default=None, metavar='PATH', help="Write phase times, HTTP and cache counts, rate-limit budget and peak memory as JSON to PATH ('-' for stdout)")
+@click.option('--profile', default=None, metavar='PATH', help='Write cProfile stats of the main thread to PATH (read with python -m pstats)')
+@click.pass_context
+def main(ctx, cache_path, cache_max_mb, api_url, timings, profile):
         """
         GitHub Reports CLI: Generate project management charts from GitHub data.
 
@@ -15,112 +28,431 @@ def main():
             issue-type-breakdown    Generate an issue type breakdown chart (by label)
             pr-activity-timeline   Generate a PR activity timeline chart (opened/closed/merged per week)
             issue-resolution-time   Generate a chart of time taken to close issues (histogram/boxplot)
+            report-all              Fetch each dataset once and render several reports from it
+            serve                   Serve reports over HTTP from data kept in memory
             # More commands coming soon...
         """
-        pass
+        cache_utils.configure_cache(cache_path, cache_max_mb * 1024 * 1024 if cache_max_mb else None)
+        github_api.configure_api(api_url)
+        if profile:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+            def stop_profiler():
+                profiler.disable()
+                profiler.dump_stats(profile)
+            ctx.call_on_close(stop_profiler)
+        if timings:
+            metrics.enable()
+            ctx.call_on_close(lambda: metrics.write(timings, ctx.invoked_subcommand))
+
+
+def _check_modes(api, stream=False, sync=False, rollup=False):
+    if stream and sync:
+        raise click.UsageError("--stream and --sync cannot be combined; --sync needs the full stored set.")
+    if rollup and (stream or sync):
+        raise click.UsageError("--rollup keeps its own incrementally updated store, so --stream and --sync do not apply.")
+    if api == 'graphql' and (stream or sync or rollup):
+        raise click.UsageError("--stream, --sync and --rollup are only available with --api rest.")
+
+
+def _resolve_repos(repo, org, token):
+    """Return the list of repos to report on and the name used in chart titles."""
+    metrics.lap('resolve_repos')
+    repos = [r.strip() for r in repo.split(",")] if repo else []
+    if org:
+        click.echo(f"Listing repositories for {org}...")
+        repos.extend(r for r in github_api.fetch_org_repos(org, token) if r not in repos)
+        if not repos:
+            raise RuntimeError(f"No repositories found for organization {org}.")
+    if not repos:
+        raise click.UsageError("Provide --repo, --org, or both.")
+    repo_name = org if org and not repo else ", ".join(repos)
+    return repos, repo_name
 
 
 @main.command()
-@click.option('--repo', required=True, help='GitHub repository in the form owner/repo')
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
 @click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories fetched in parallel')
+@click.option('--api', type=click.Choice(['rest', 'graphql']), default='rest', show_default=True, help='GitHub API used to fetch data; graphql requests only the fields the report needs')
+@click.option('--sync', is_flag=True, help='Update stored data with only the items changed since the last sync')
+@click.option('--stream', is_flag=True, help='Stream pages straight into the report instead of loading the full history first; repositories are streamed one after another, so --concurrency does not apply')
+@click.option('--rollup', is_flag=True, help='Report from persisted per-repo rollups, updated with only the changes since the last run')
 @click.option('--output', default='pr_activity_timeline.png', help='Output file for the chart')
-def pr_activity_timeline(repo, token, output):
+@click.option('--dpi', type=int, default=None, help='Resolution of raster (PNG) output; the format follows the output file extension')
+def pr_activity_timeline(repo, org, token, concurrency, sync, output, dpi, stream, api, rollup):
     """Generate a PR activity timeline chart (opened/closed/merged per week)."""
+    import utils
     try:
-        repos = [r.strip() for r in repo.split(",")]
-        repo_name = ", ".join(repos)
-        click.echo(f"Fetching pull requests for {repo_name}...")
-        prs = github_api.fetch_pull_requests_multi(repos, token)
-        click.echo(f"Processing PR activity timeline data...")
-        week_list, opened_counts, closed_counts, merged_counts = utils.pr_activity_timeline_data(prs)
+        _check_modes(api, stream, sync, rollup)
+        repos, repo_name = _resolve_repos(repo, org, token)
+        if rollup:
+            metrics.lap('fetch')
+            click.echo(f"Updating pull request rollups for {repo_name}...")
+            week_list, opened_counts, closed_counts, merged_counts = rollups.pr_activity_timeline_data(
+                rollups.pull_request_rollup_multi(repos, token, concurrency=concurrency))
+        else:
+            metrics.lap('fetch')
+            click.echo(f"Fetching pull requests for {repo_name}...")
+            if stream:
+                prs = github_api.iter_pull_requests_multi(repos, token)
+            else:
+                prs = github_api.fetch_pull_requests_multi(repos, token, concurrency=concurrency, sync=sync, api=api)
+            metrics.lap('aggregate')
+            click.echo(f"Processing PR activity timeline data...")
+            week_list, opened_counts, closed_counts, merged_counts = utils.pr_activity_timeline_data(prs)
+        metrics.lap('render')
         click.echo(f"Plotting PR activity timeline chart to {output}...")
-        utils.plot_pr_activity_timeline(week_list, opened_counts, closed_counts, merged_counts, output, repo_name=repo_name)
+        utils.plot_pr_activity_timeline(week_list, opened_counts, closed_counts, merged_counts, output, repo_name=repo_name, dpi=dpi)
         click.echo("PR activity timeline chart generated.")
     except RuntimeError as e:
         click.echo(f"Error: {e}")
 
 
 @main.command()
-@click.option('--repo', required=True, help='GitHub repository in the form owner/repo')
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
 @click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories fetched in parallel')
+@click.option('--api', type=click.Choice(['rest', 'graphql']), default='rest', show_default=True, help='GitHub API used to fetch data; graphql requests only the fields the report needs')
+@click.option('--sync', is_flag=True, help='Update stored data with only the items changed since the last sync')
+@click.option('--stream', is_flag=True, help='Stream pages straight into the report instead of loading the full history first; repositories are streamed one after another, so --concurrency does not apply')
+@click.option('--rollup', is_flag=True, help='Report from persisted per-repo rollups, updated with only the changes since the last run')
 @click.option('--output', default='issue_resolution_time.png', help='Output file for the chart')
+@click.option('--dpi', type=int, default=None, help='Resolution of raster (PNG) output; the format follows the output file extension')
 @click.option('--chart-type', type=click.Choice(['hist', 'box']), default='hist', help='Chart type: hist or box')
-def issue_resolution_time(repo, token, output, chart_type):
+def issue_resolution_time(repo, org, token, concurrency, sync, output, chart_type, dpi, stream, api, rollup):
     """Generate an issue resolution time chart (histogram/boxplot of time to close issues)."""
+    import utils
     try:
-        repos = [r.strip() for r in repo.split(",")]
-        repo_name = ", ".join(repos)
-        click.echo(f"Fetching issues for {repo_name}...")
-        issues = github_api.fetch_all_issues_multi(repos, token)
-        click.echo(f"Processing issue resolution time data...")
-        times = utils.issue_resolution_time_data(issues)
+        _check_modes(api, stream, sync, rollup)
+        repos, repo_name = _resolve_repos(repo, org, token)
+        weights = None
+        if rollup:
+            metrics.lap('fetch')
+            click.echo(f"Updating issue rollups for {repo_name}...")
+            times, weights = rollups.issue_resolution_time_data(rollups.issue_rollup_multi(repos, token, concurrency=concurrency))
+        else:
+            metrics.lap('fetch')
+            click.echo(f"Fetching issues for {repo_name}...")
+            if stream:
+                issues = github_api.iter_all_issues_multi(repos, token)
+            else:
+                issues = github_api.fetch_all_issues_multi(repos, token, concurrency=concurrency, sync=sync, api=api)
+            metrics.lap('aggregate')
+            click.echo(f"Processing issue resolution time data...")
+            times = utils.issue_resolution_time_data(issues)
+        metrics.lap('render')
         click.echo(f"Plotting issue resolution time chart to {output}...")
-        utils.plot_issue_resolution_time(times, output, chart_type, repo_name=repo_name)
+        utils.plot_issue_resolution_time(times, output, chart_type, repo_name=repo_name, dpi=dpi, weights=weights)
         click.echo("Issue resolution time chart generated.")
     except RuntimeError as e:
         click.echo(f"Error: {e}")
 
 
 @main.command()
-@click.option('--repo', required=True, help='GitHub repository in the form owner/repo')
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
 @click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories fetched in parallel')
+@click.option('--api', type=click.Choice(['rest', 'graphql']), default='rest', show_default=True, help='GitHub API used to fetch data; graphql requests only the fields the report needs')
+@click.option('--sync', is_flag=True, help='Update stored data with only the items changed since the last sync')
+@click.option('--stream', is_flag=True, help='Stream pages straight into the report instead of loading the full history first; repositories are streamed one after another, so --concurrency does not apply')
+@click.option('--rollup', is_flag=True, help='Report from persisted per-repo rollups, updated with only the changes since the last run')
 @click.option('--output', default='issue_type_breakdown.png', help='Output file for the chart')
+@click.option('--dpi', type=int, default=None, help='Resolution of raster (PNG) output; the format follows the output file extension')
 @click.option('--chart-type', type=click.Choice(['pie', 'bar']), default='pie', help='Chart type: pie or bar')
-def issue_type_breakdown(repo, token, output, chart_type):
+@click.option('--fast', is_flag=True, help='Count issues per label server-side instead of downloading every issue')
+@click.option('--state', type=click.Choice(['all', 'open', 'closed']), default='all', show_default=True, help='Only count issues in this state')
+@click.option('--since', type=click.DateTime(), default=None, help='Only count issues created on or after this date')
+@click.option('--until', type=click.DateTime(), default=None, help='Only count issues created on or before this date')
+def issue_type_breakdown(repo, org, token, concurrency, sync, output, chart_type, dpi, stream, api, fast, state, since, until, rollup):
     """Generate an issue type breakdown chart (by label)."""
+    import utils
     try:
-        repos = [r.strip() for r in repo.split(",")]
-        repo_name = ", ".join(repos)
-        click.echo(f"Fetching issues for {repo_name}...")
-        issues = github_api.fetch_all_issues_multi(repos, token)
-        click.echo(f"Processing issue type breakdown data...")
-        counter = utils.issue_type_breakdown_data(issues)
+        _check_modes(api, stream, sync, rollup)
+        if fast and (stream or sync or rollup):
+            raise click.UsageError("--fast does not download issues, so --stream, --sync and --rollup do not apply.")
+        if rollup and (since or until):
+            raise click.UsageError("Label counts in rollups are not split by date; drop --since/--until or use --fast.")
+        repos, repo_name = _resolve_repos(repo, org, token)
+        if rollup:
+            metrics.lap('fetch')
+            click.echo(f"Updating issue rollups for {repo_name}...")
+            counter = rollups.issue_type_breakdown_data(rollups.issue_rollup_multi(repos, token, concurrency=concurrency), state)
+        elif fast:
+            metrics.lap('fetch')
+            click.echo(f"Counting issues per label for {repo_name}...")
+            counter = github_api.fetch_label_counts_multi(repos, token, state, since, until, concurrency=concurrency, api=api)
+        else:
+            metrics.lap('fetch')
+            click.echo(f"Fetching issues for {repo_name}...")
+            if stream:
+                issues = github_api.iter_all_issues_multi(repos, token)
+            else:
+                issues = github_api.fetch_all_issues_multi(repos, token, concurrency=concurrency, sync=sync, api=api)
+            metrics.lap('aggregate')
+            click.echo(f"Processing issue type breakdown data...")
+            counter = utils.issue_type_breakdown_data(issues, state, since, until)
+        metrics.lap('render')
         click.echo(f"Plotting issue type breakdown chart to {output}...")
-        utils.plot_issue_type_breakdown(counter, output, chart_type, repo_name=repo_name)
+        utils.plot_issue_type_breakdown(counter, output, chart_type, repo_name=repo_name, dpi=dpi)
         click.echo("Issue type breakdown chart generated.")
     except RuntimeError as e:
         click.echo(f"Error: {e}")
 
 
 @main.command()
-@click.option('--repo', required=True, help='GitHub repository in the form owner/repo')
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
 @click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories fetched in parallel')
+@click.option('--api', type=click.Choice(['rest', 'graphql']), default='rest', show_default=True, help='GitHub API used to fetch data; graphql requests only the fields the report needs')
+@click.option('--sync', is_flag=True, help='Update stored data with only the items changed since the last sync')
+@click.option('--stream', is_flag=True, help='Stream pages straight into the report instead of loading the full history first; repositories are streamed one after another, so --concurrency does not apply')
+@click.option('--rollup', is_flag=True, help='Report from persisted per-repo rollups, updated with only the changes since the last run')
 @click.option('--output', default='burndown.png', help='Output file for the burndown chart')
-def burndown(repo, token, output):
+@click.option('--dpi', type=int, default=None, help='Resolution of raster (PNG) output; the format follows the output file extension')
+@click.option('--since', type=click.DateTime(), default=None, help='Start of the burndown window (UTC), e.g. a sprint start')
+@click.option('--until', type=click.DateTime(), default=None, help='End of the burndown window (UTC)')
+@click.option('--milestone', default=None, help='Only include issues in the milestone with this title')
+def burndown(repo, org, token, concurrency, sync, output, since, until, milestone, dpi, stream, api, rollup):
     """Generate a burndown chart from issues."""
+    import utils
     try:
-        repos = [r.strip() for r in repo.split(",")]
-        repo_name = ", ".join(repos)
-        click.echo(f"Fetching issues for {repo_name}...")
-        issues = github_api.fetch_all_issues_multi(repos, token)
-        click.echo(f"Processing burndown data...")
-        date_range, open_counts, closed_counts = utils.burndown_data_from_issues(issues)
+        _check_modes(api, stream, sync, rollup)
+        if rollup and milestone is not None:
+            raise click.UsageError("Rollups are not split by milestone; drop --milestone or --rollup.")
+        repos, repo_name = _resolve_repos(repo, org, token)
+        if rollup:
+            metrics.lap('fetch')
+            click.echo(f"Updating issue rollups for {repo_name}...")
+            date_range, open_counts, closed_counts = rollups.burndown_data(
+                rollups.issue_rollup_multi(repos, token, concurrency=concurrency), since, until)
+        else:
+            metrics.lap('fetch')
+            click.echo(f"Fetching issues for {repo_name}...")
+            if stream:
+                issues = github_api.iter_all_issues_multi(repos, token)
+            else:
+                issues = github_api.fetch_all_issues_multi(repos, token, concurrency=concurrency, sync=sync, api=api)
+            metrics.lap('aggregate')
+            click.echo(f"Processing burndown data...")
+            date_range, open_counts, closed_counts = utils.burndown_data_from_issues(issues, since, until, milestone)
+        if not date_range:
+            raise RuntimeError("No issues in the selected window or milestone.")
+        metrics.lap('render')
         click.echo(f"Plotting burndown chart to {output}...")
-        utils.plot_burndown(date_range, open_counts, closed_counts, output, repo_name=repo_name)
+        utils.plot_burndown(date_range, open_counts, closed_counts, output, repo_name=repo_name, dpi=dpi)
         click.echo("Burndown chart generated.")
     except RuntimeError as e:
         click.echo(f"Error: {e}")
 
 @main.command()
-@click.option('--repo', required=True, help='GitHub repository in the form owner/repo')
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
 @click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories fetched in parallel')
+@click.option('--api', type=click.Choice(['rest', 'graphql']), default='rest', show_default=True, help='GitHub API used to fetch data; graphql requests only the fields the report needs')
 @click.option('--months', default=3, help='Number of months to summarize')
+@click.option('--stream', is_flag=True, help='Stream pages straight into the report instead of loading the full history first; repositories are streamed one after another, so --concurrency does not apply')
+@click.option('--rollup', is_flag=True, help='Report from persisted per-repo rollups, updated with only the changes since the last run')
 @click.option('--output', default='commits.png', help='Output file for the commit summary chart')
-def commit_summary(repo, token, months, output):
+@click.option('--dpi', type=int, default=None, help='Resolution of raster (PNG) output; the format follows the output file extension')
+def commit_summary(repo, org, token, concurrency, months, output, dpi, stream, api, rollup):
     """Generate a commit count summary per user."""
+    import utils
     try:
-        repos = [r.strip() for r in repo.split(",")]
-        repo_name = ", ".join(repos)
-        click.echo(f"Fetching commits for {repo_name} over last {months} months...")
-        since = (datetime.now(timezone.utc) - timedelta(days=months*30)).replace(hour=0, minute=0, second=0, microsecond=0)
-        commits = github_api.fetch_commits_multi(repos, token, since)
-        click.echo(f"Processing weekly commit summary data...")
-        user_week_counts, week_labels = utils.commit_summary_weekly_data(commits)
+        _check_modes(api, stream, rollup=rollup)
+        repos, repo_name = _resolve_repos(repo, org, token)
+        since = github_api.months_ago(months)
+        if rollup:
+            metrics.lap('fetch')
+            click.echo(f"Updating commit rollups for {repo_name}...")
+            user_week_counts, week_labels = rollups.commit_summary_weekly_data(
+                rollups.commit_rollup_multi(repos, token, since, concurrency=concurrency), since)
+        else:
+            metrics.lap('fetch')
+            click.echo(f"Fetching commits for {repo_name} over last {months} months...")
+            if stream:
+                commits = github_api.iter_commits_multi(repos, token, since)
+            else:
+                commits = github_api.fetch_commits_multi(repos, token, since, concurrency=concurrency, api=api)
+            metrics.lap('aggregate')
+            click.echo(f"Processing weekly commit summary data...")
+            user_week_counts, week_labels = utils.commit_summary_weekly_data(commits)
+        metrics.lap('render')
         click.echo(f"Plotting weekly commit summary chart to {output}...")
-        utils.plot_commit_summary_weekly(user_week_counts, week_labels, output, repo_name=repo_name)
+        utils.plot_commit_summary_weekly(user_week_counts, week_labels, output, repo_name=repo_name, dpi=dpi)
         click.echo("Weekly commit summary chart generated.")
     except RuntimeError as e:
         click.echo(f"Error: {e}")
 
+
+# Report name -> (dataset it is built from, default output file).
+REPORTS = {
+    'burndown': ('issues', 'burndown.png'),
+    'commit-summary': ('commits', 'commits.png'),
+    'issue-type-breakdown': ('issues', 'issue_type_breakdown.png'),
+    'pr-activity-timeline': ('prs', 'pr_activity_timeline.png'),
+    'issue-resolution-time': ('issues', 'issue_resolution_time.png'),
+}
+
+
+@main.command(name='report-all')
+@click.option('--config', 'config_path', type=click.Path(exists=True, dir_okay=False), default=None, help='TOML file listing repos, org, reports, output_dir, months and [outputs]')
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
+@click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories fetched in parallel')
+@click.option('--api', type=click.Choice(['rest', 'graphql']), default='rest', show_default=True, help='GitHub API used to fetch data; graphql requests only the fields the report needs')
+@click.option('--sync', is_flag=True, help='Update stored data with only the items changed since the last sync')
+@click.option('--rollup', is_flag=True, help='Report from persisted per-repo rollups, updated with only the changes since the last run')
+@click.option('--report', 'reports', multiple=True, type=click.Choice(list(REPORTS)), help='Report to render (repeatable); defaults to all of them')
+@click.option('--output-dir', default=None, help='Directory the charts are written to (default: current directory)')
+@click.option('--months', default=None, type=int, help='Number of months to summarize in commit-summary (default: 3)')
+@click.option('--format', 'fmt', type=click.Choice(render.FORMATS), default=None, help='Format of charts without an explicit output name (default: png)')
+@click.option('--dpi', type=int, default=None, help='Resolution of raster (PNG) output')
+@click.option('--render-workers', type=int, default=None, help='Processes used to render charts (default: one per core)')
+def report_all(config_path, repo, org, token, concurrency, sync, reports, output_dir, months, fmt, dpi, render_workers, api, rollup):
+    """Fetch each dataset once and render several reports from it."""
+    try:
+        config = _load_report_config(config_path)
+        repo = repo or (",".join(config['repos']) if config.get('repos') else None)
+        org = org or config.get('org')
+        reports = reports or tuple(config.get('reports', REPORTS))
+        output_dir = output_dir or config.get('output_dir', '.')
+        months = months or config.get('months', 3)
+        fmt = fmt or config.get('format', 'png')
+        dpi = dpi or config.get('dpi')
+        outputs = config.get('outputs', {})
+        unknown = [name for name in list(reports) + list(outputs) if name not in REPORTS]
+        if unknown:
+            raise click.UsageError(f"Unknown report(s) in config: {', '.join(unknown)}")
+
+        _check_modes(api, sync=sync, rollup=rollup)
+        repos, repo_name = _resolve_repos(repo, org, token)
+        datasets = {REPORTS[name][0] for name in reports}
+        metrics.lap('fetch')
+        click.echo(f"Fetching {', '.join(sorted(datasets))} for {repo_name}...")
+        since = github_api.months_ago(months)
+        if rollup:
+            fetchers = {
+                'issues': lambda: rollups.issue_rollup_multi(repos, token, concurrency=concurrency),
+                'prs': lambda: rollups.pull_request_rollup_multi(repos, token, concurrency=concurrency),
+                'commits': lambda: rollups.commit_rollup_multi(repos, token, since, concurrency=concurrency),
+            }
+        else:
+            fetchers = {
+                'issues': lambda: github_api.fetch_all_issues_multi(repos, token, concurrency=concurrency, sync=sync, api=api),
+                'prs': lambda: github_api.fetch_pull_requests_multi(repos, token, concurrency=concurrency, sync=sync, api=api),
+                'commits': lambda: github_api.fetch_commits_multi(repos, token, since, concurrency=concurrency, api=api),
+            }
+        # The datasets are independent, so their fetches overlap.
+        with ThreadPoolExecutor(max_workers=len(datasets)) as executor:
+            futures = {name: executor.submit(fetchers[name]) for name in datasets}
+            data = {name: future.result() for name, future in futures.items()}
+
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = []
+        for name in reports:
+            dataset, default_output = REPORTS[name]
+            default_output = os.path.splitext(default_output)[0] + '.' + fmt
+            output = os.path.join(output_dir, outputs.get(name, default_output))
+            metrics.lap('aggregate')
+            click.echo(f"Processing {name} data for {output}...")
+            if rollup:
+                jobs.append(_rollup_report_job(name, data[dataset], output, repo_name, dpi, since))
+            else:
+                jobs.append(_report_job(name, data[dataset], output, repo_name, dpi))
+        metrics.lap('render')
+        click.echo(f"Plotting {len(jobs)} chart(s)...")
+        render.render_charts(jobs, render_workers)
+        click.echo(f"{len(jobs)} chart(s) generated.")
+    except RuntimeError as e:
+        click.echo(f"Error: {e}")
+
+
+@main.command()
+@click.option('--repo', default=None, help='GitHub repository in the form owner/repo (comma-separated for several)')
+@click.option('--org', default=None, help='GitHub organization whose repositories should all be included')
+@click.option('--token', required=True, help='GitHub personal access token')
+@click.option('--concurrency', default=github_api.DEFAULT_CONCURRENCY, show_default=True, help='Number of repositories refreshed in parallel')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', default=8000, show_default=True, help='Port to listen on')
+@click.option('--refresh-interval', default=300, show_default=True, help='Seconds between background refreshes of every repository')
+@click.option('--months', default=3, show_default=True, help='Commit history kept for commit-summary, in months')
+@click.option('--dpi', type=int, default=None, help='Resolution of PNG charts')
+@click.option('--webhook-secret', envvar='GITHUB_REPORTS_WEBHOOK_SECRET', default=None, help='Secret used to verify X-Hub-Signature-256 on POST /webhook')
+def serve(repo, org, token, concurrency, host, port, refresh_interval, months, dpi, webhook_secret):
+    """Serve reports over HTTP from data kept in memory.
+
+    GET /reports/<report>.png (or .svg) renders a report; ?repo= picks
+    repositories and the other query parameters match the command options
+    (chart_type, state, since, until, milestone, months). POST /refresh?repo=
+    or a GitHub webhook to POST /webhook refreshes one repository at once.
+    """
+    import server
+    try:
+        repos, repo_name = _resolve_repos(repo, org, token)
+        click.echo(f"Loading data for {repo_name}...")
+        store = server.ReportStore(repos, token, months, concurrency, refresh_interval, log=click.echo)
+        server.serve(store, host, port, dpi, webhook_secret)
+    except RuntimeError as e:
+        click.echo(f"Error: {e}")
+
+
+def _load_report_config(path):
+    """Read a report-all config file, or return an empty config if no path is given."""
+    if not path:
+        return {}
+    with open(path, 'rb') as f:
+        try:
+            return tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise click.UsageError(f"Invalid config file {path}: {e}")
+
+
+def _report_job(name, data, output, repo_name, dpi=None):
+    """Compute one report from an already-fetched dataset and return its render job.
+
+    Default chart types are used. See render.render_charts for the job format.
+    """
+    import utils
+    kwargs = {'repo_name': repo_name, 'dpi': dpi}
+    if name == 'burndown':
+        return 'plot_burndown', (*utils.burndown_data_from_issues(data), output), kwargs
+    elif name == 'commit-summary':
+        return 'plot_commit_summary_weekly', (*utils.commit_summary_weekly_data(data), output), kwargs
+    elif name == 'issue-type-breakdown':
+        return 'plot_issue_type_breakdown', (utils.issue_type_breakdown_data(data), output), kwargs
+    elif name == 'pr-activity-timeline':
+        return 'plot_pr_activity_timeline', (*utils.pr_activity_timeline_data(data), output), kwargs
+    elif name == 'issue-resolution-time':
+        return 'plot_issue_resolution_time', (utils.issue_resolution_time_data(data), output), kwargs
+
+
+def _rollup_report_job(name, rollup, output, repo_name, dpi=None, since=None):
+    """Like _report_job, but computes the report from a summed rollup (see rollups)."""
+    kwargs = {'repo_name': repo_name, 'dpi': dpi}
+    if name == 'burndown':
+        return 'plot_burndown', (*rollups.burndown_data(rollup), output), kwargs
+    elif name == 'commit-summary':
+        return 'plot_commit_summary_weekly', (*rollups.commit_summary_weekly_data(rollup, since), output), kwargs
+    elif name == 'issue-type-breakdown':
+        return 'plot_issue_type_breakdown', (rollups.issue_type_breakdown_data(rollup), output), kwargs
+    elif name == 'pr-activity-timeline':
+        return 'plot_pr_activity_timeline', (*rollups.pr_activity_timeline_data(rollup), output), kwargs
+    elif name == 'issue-resolution-time':
+        times, weights = rollups.issue_resolution_time_data(rollup)
+        return 'plot_issue_resolution_time', (times, output), dict(kwargs, weights=weights)
+
 if __name__ == '__main__':
+    # report-all renders in a process pool; in the frozen binary each worker
+    # re-runs this entry point, and freeze_support() turns it into a worker.
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
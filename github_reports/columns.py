@@ -0,0 +1,94 @@
+"""Columnar helpers shared by the report data functions in utils.
+
+Each timestamp column is parsed once, in bulk, into a NumPy datetime64[s]
+array (NaT for missing values). Daily and weekly binning is then done with
+integer arithmetic on those arrays instead of per-item strptime calls.
+"""
+from itertools import islice
+from operator import attrgetter
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+# 1970-01-01 was a Thursday; Monday is weekday 0 as in datetime.weekday().
+_EPOCH_WEEKDAY = 3
+
+
+def timestamp_column(values):
+    """Parse GitHub ISO timestamps ('2024-01-31T12:00:00Z', or None) into a datetime64[s] array."""
+    # datetime64 parsing rejects the trailing 'Z'; all GitHub timestamps are UTC.
+    return np.array([v[:19] if v else 'NaT' for v in values], dtype='datetime64[s]')
+
+
+def seconds(ts):
+    """Return seconds since the epoch as int64 (NaT entries become meaningless; mask them first)."""
+    return ts.astype(np.int64)
+
+
+def day_numbers(ts):
+    """Return the day number (days since the epoch) of each timestamp."""
+    return ts.astype('datetime64[D]').astype(np.int64)
+
+
+def weekdays(ts):
+    """Return the weekday of each timestamp, Monday=0."""
+    return (day_numbers(ts) + _EPOCH_WEEKDAY) % 7
+
+
+def year_week_keys(ts):
+    """Return year * 100 + week for each timestamp, matching strftime('%Y-%W').
+
+    %W counts Monday-started weeks, with the days before the year's first
+    Monday in week 00.
+    """
+    years = ts.astype('datetime64[Y]')
+    day_of_year = (ts.astype('datetime64[D]') - years.astype('datetime64[D]')).astype(np.int64)
+    week = (day_of_year + 7 - weekdays(ts)) // 7
+    return (years.astype(np.int64) + 1970) * 100 + week
+
+
+def format_year_week(key):
+    """Format a year_week_keys value as strftime('%Y-%W') would."""
+    return f'{key // 100}-{key % 100:02d}'
+
+
+def count_by_key(keys, universe):
+    """Return how many times each value of the sorted array universe occurs in keys."""
+    return np.bincount(np.searchsorted(universe, keys), minlength=len(universe))
+
+
+# Records are parsed into columns this many at a time while they stream past.
+CHUNK_SIZE = 10000
+
+
+def collect(records, timestamps=(), factors=(), chunk_size=CHUNK_SIZE):
+    """Consume records once, keeping only the named fields as columns.
+
+    Records are taken chunk_size at a time: timestamp fields are parsed into
+    datetime64[s] arrays and factor fields (such as author names) become
+    integer codes, so records streaming in from a generator can be dropped
+    as soon as their chunk is done. Returns (columns, uniques): field name ->
+    array, and factor field name -> distinct values in order of first
+    appearance.
+    """
+    records = iter(records)
+    indexes = {field: {} for field in factors}
+    chunks = {field: [] for field in (*timestamps, *factors)}
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        for field in timestamps:
+            get = attrgetter(field)
+            chunks[field].append(timestamp_column([get(r) for r in chunk]))
+        for field in factors:
+            get = attrgetter(field)
+            index = indexes[field]
+            codes = [index.setdefault(get(r), len(index)) for r in chunk]
+            chunks[field].append(np.array(codes, dtype=np.int64))
+    result = {}
+    for field in timestamps:
+        result[field] = np.concatenate(chunks[field]) if chunks[field] else timestamp_column([])
+    for field in factors:
+        result[field] = np.concatenate(chunks[field]) if chunks[field] else np.zeros(0, dtype=np.int64)
+    return result, {field: list(index) for field, index in indexes.items()}
@@ -1,101 +1,614 @@
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+import os
+import threading
+from urllib.parse import urlencode, urlparse, parse_qs, parse_qsl
 from cache_utils import load_cache, save_cache
-import requests
+from rate_limit import REQUEST_TIMEOUT, scheduler
+import metrics
+import records
 
 
-def fetch_all_issues(repo, token):
-    """Fetch all issues (open and closed) from a GitHub repo."""
-    # Use repo and token as cache key (token is sensitive, but needed for private repos)
-    cache_key = f"fetch_all_issues::{repo}::{token}"
-    cached = load_cache(cache_key)
+# Base URL of the REST API; GraphQL is served from API_URL + '/graphql'. Point
+# it elsewhere (GITHUB_API_URL, --api-url) for GitHub Enterprise or a local
+# stand-in server such as benchmarks/mock_server.py.
+DEFAULT_API_URL = 'https://api.github.com'
+API_URL = (os.environ.get('GITHUB_API_URL') or DEFAULT_API_URL).rstrip('/')
+
+# Default number of repositories fetched in parallel by the *_multi functions.
+DEFAULT_CONCURRENCY = 8
+# Number of pages of a single listing fetched in parallel once the page count is known.
+PAGE_CONCURRENCY = 4
+# The commit store is not asked for commits newer than its newest range when that range ends less than this long ago.
+COMMIT_STORE_FRESH_SECONDS = 3600
+# Committer dates are set where the commit was made, not when it was pushed,
+# so a commit can show up with a date inside an already covered range. The
+# newest part of the window is refetched from this far back to pick those up.
+COMMIT_STORE_LOOKBACK_SECONDS = 7 * 86400
+# GitHub's REST timestamps ('2024-01-31T12:00:00Z'); in this form they compare correctly as strings.
+_ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def configure_api(url=None):
+    """Set the API base URL used by every request; None keeps the current one."""
+    global API_URL
+    if url:
+        API_URL = url.rstrip('/')
+
+
+class TransientAPIError(RuntimeError):
+    """A request kept failing in a way that is normally temporary (network error or 5xx)."""
+
+
+class FetchCancelled(RuntimeError):
+    """A fetch of a *_multi call stopped early because the fetch of another repo failed."""
+
+
+# The cancellation event of the _fetch_multi call this thread is fetching for, if any.
+_local = threading.local()
+
+
+def fetch_all_issues(repo, token, sync=False):
+    """Fetch all issues (open and closed) from a GitHub repo.
+
+    With sync=True the stored issue set is brought up to date with only the
+    issues changed since the last sync, instead of expiring and refetching.
+    """
+    if sync:
+        return _sync_issues(repo, token)
+    cached = load_cache(repo, 'issues')
     if cached is not None:
         return cached
-    issues = []
-    page = 1
-    while True:
-        url = f'https://api.github.com/repos/{repo}/issues'
-        params = {'state': 'all', 'per_page': 100, 'page': page}
-        batch = github_api_get(url, token, params)
-        if not batch:
-            break
-        # Exclude pull requests (they have a 'pull_request' key)
-        filtered_batch = [issue for issue in batch if 'pull_request' not in issue]
-        issues.extend(filtered_batch)
-        page += 1
-    save_cache(cache_key, issues)
+    url = f'{API_URL}/repos/{repo}/issues'
+    issues = _fetch_pages(url, token, {'state': 'all'}, records.issues_from_page)
+    save_cache(repo, 'issues', issues)
     return issues
 
 
-def fetch_all_issues_multi(repos, token):
-    """Fetch and aggregate issues from multiple repositories."""
-    all_issues = []
-    for repo in repos:
-        all_issues.extend(fetch_all_issues(repo.strip(), token))
-    return all_issues
+def fetch_all_issues_multi(repos, token, concurrency=DEFAULT_CONCURRENCY, sync=False, api='rest'):
+    """Fetch and aggregate issues from multiple repositories.
+
+    api='graphql' fetches through github_graphql instead of the REST API.
+    """
+    if api == 'graphql':
+        import github_graphql
+        return _fetch_multi(github_graphql.fetch_all_issues, repos, concurrency, token)
+    return _fetch_multi(fetch_all_issues, repos, concurrency, token, sync)
 
 
 def fetch_commits(repo, token, since):
-    """Fetch commits since a given date from a GitHub repo."""
-    cache_key = f"fetch_commits::{repo}::{token}::{since.isoformat()}"
-    cached = load_cache(cache_key)
-    if cached is not None:
-        return cached
-    commits = []
-    page = 1
-    while True:
-        url = f'https://api.github.com/repos/{repo}/commits'
-        params = {'since': since.isoformat(), 'per_page': 100, 'page': page}
-        batch = github_api_get(url, token, params)
-        if not batch:
-            break
-        commits.extend(batch)
-        page += 1
-    save_cache(cache_key, commits)
-    return commits
-
-
-def fetch_commits_multi(repos, token, since):
+    """Fetch commits since a given date from a GitHub repo.
+
+    Commits are kept in a per-repo store that remembers which committer-date
+    ranges it already covers, so only the parts of the window it is missing
+    are requested: older ones with until=, newer ones with since=.
+    """
+    return stored_commits(repo, 'commit_store', since, lambda start, end: fetch_commits_between(repo, token, start, end))
+
+
+def fetch_commits_between(repo, token, since, until=None):
+    """Fetch commits committed between two ISO timestamps (until=None: up to now), bypassing the commit store."""
+    params = {'since': since}
+    if until:
+        params['until'] = until
+    url = f'{API_URL}/repos/{repo}/commits'
+    return _fetch_pages(url, token, params, records.commits_from_page)
+
+
+def fetch_commits_multi(repos, token, since, concurrency=DEFAULT_CONCURRENCY, api='rest'):
     """Fetch and aggregate commits from multiple repositories since a given date."""
-    all_commits = []
-    for repo in repos:
-        all_commits.extend(fetch_commits(repo.strip(), token, since))
-    return all_commits
+    if api == 'graphql':
+        import github_graphql
+        return _fetch_multi(github_graphql.fetch_commits, repos, concurrency, token, since)
+    return _fetch_multi(fetch_commits, repos, concurrency, token, since)
 
 
-def fetch_pull_requests(repo, token, state='all'):
-    """Fetch all pull requests from a GitHub repo."""
-    cache_key = f"fetch_pull_requests::{repo}::{token}::{state}"
-    cached = load_cache(cache_key)
+def fetch_pull_requests(repo, token, state='all', sync=False):
+    """Fetch all pull requests from a GitHub repo.
+
+    With sync=True only pull requests updated since the last sync are
+    requested and merged into the stored set (see fetch_all_issues).
+    """
+    if sync:
+        return _sync_pull_requests(repo, token, state)
+    cached = load_cache(repo, 'pulls', state)
     if cached is not None:
         return cached
-    prs = []
-    page = 1
-    while True:
-        url = f'https://api.github.com/repos/{repo}/pulls'
-        params = {'state': state, 'per_page': 100, 'page': page}
-        batch = github_api_get(url, token, params)
-        if not batch:
-            break
-        prs.extend(batch)
-        page += 1
-    save_cache(cache_key, prs)
+    url = f'{API_URL}/repos/{repo}/pulls'
+    prs = _fetch_pages(url, token, {'state': state}, records.pull_requests_from_page)
+    save_cache(repo, 'pulls', prs, state)
     return prs
 
 
-def fetch_pull_requests_multi(repos, token, state='all'):
+def fetch_pull_requests_multi(repos, token, state='all', concurrency=DEFAULT_CONCURRENCY, sync=False, api='rest'):
     """Fetch and aggregate pull requests from multiple repositories."""
-    all_prs = []
+    if api == 'graphql':
+        import github_graphql
+        return _fetch_multi(github_graphql.fetch_pull_requests, repos, concurrency, token, state)
+    return _fetch_multi(fetch_pull_requests, repos, concurrency, token, state, sync)
+
+
+def fetch_org_repos(org, token):
+    """Return the full names (owner/repo) of every repository in an organization."""
+    cached = load_cache(org, 'org_repos')
+    if cached is not None:
+        return cached
+    url = f'{API_URL}/orgs/{org}/repos'
+    names = sorted(_fetch_pages(url, token, {'type': 'all'}, records.repo_names_from_page))
+    save_cache(org, 'org_repos', names)
+    return names
+
+
+def fetch_labels(repo, token):
+    """Return the names of every label defined in a GitHub repo."""
+    cached = load_cache(repo, 'labels')
+    if cached is not None:
+        return cached
+    url = f'{API_URL}/repos/{repo}/labels'
+    names = _fetch_pages(url, token, {}, records.label_names_from_page)
+    save_cache(repo, 'labels', names)
+    return names
+
+
+def fetch_label_counts(repo, token, state='all', since=None, until=None):
+    """Return a Counter of how many issues carry each label, without downloading the issues.
+
+    One search API request per label reads its total_count, so the cost
+    grows with the number of labels rather than the number of issues.
+    state is 'all', 'open' or 'closed'; since/until filter on the creation
+    date (whole days, inclusive). Labels with no matching issues are left out.
+    """
+    window = f"{state}:{since.date() if since else ''}..{until.date() if until else ''}"
+    cached = load_cache(repo, 'label_counts', window)
+    if cached is not None:
+        return cached
+    qualifiers = [f'repo:{repo}', 'is:issue']
+    if state != 'all':
+        qualifiers.append(f'state:{state}')
+    if since or until:
+        qualifiers.append(f"created:{since.date().isoformat() if since else '*'}..{until.date().isoformat() if until else '*'}")
+    counts = Counter()
+    for label in fetch_labels(repo, token):
+        check_cancelled()
+        # Search has no way to escape a double quote inside a quoted label name.
+        name = label.replace('"', '')
+        query = ' '.join(qualifiers + [f'label:"{name}"'])
+        result = github_api_get(f'{API_URL}/search/issues', token, {'q': query, 'per_page': 1})
+        if result['total_count']:
+            counts[label] = result['total_count']
+    save_cache(repo, 'label_counts', counts, window)
+    return counts
+
+
+def fetch_label_counts_multi(repos, token, state='all', since=None, until=None, concurrency=DEFAULT_CONCURRENCY, api='rest'):
+    """Sum label counts over multiple repositories (see fetch_label_counts).
+
+    api='graphql' reads each label's issue totalCount instead, which needs
+    only one request per 100 labels but cannot filter by date; with since or
+    until the search API is used either way.
+    """
+    if api == 'graphql' and since is None and until is None:
+        import github_graphql
+        fetch, args = github_graphql.fetch_label_counts, (token, state)
+    else:
+        fetch, args = fetch_label_counts, (token, state, since, until)
+    total = Counter()
+    for counts in _fetch_multi(lambda repo, *a: [fetch(repo, *a)], repos, concurrency, *args):
+        total.update(counts)
+    return total
+
+
+def iter_all_issues(repo, token):
+    """Yield a repo's issues page by page instead of returning one list.
+
+    A fresh fetch_all_issues result is replayed from the cache; otherwise the
+    pages are streamed from the API (each page is cached as it arrives, so a
+    later run revalidates them cheaply).
+    """
+    cached = load_cache(repo, 'issues')
+    if cached is not None:
+        yield from cached
+        return
+    url = f'{API_URL}/repos/{repo}/issues'
+    for page in _iter_pages(url, token, {'state': 'all'}, records.issues_from_page):
+        yield from page
+
+
+def iter_commits(repo, token, since):
+    """Yield a repo's commits since a given date page by page (see iter_all_issues).
+
+    The commit store is used when it already covers the whole window.
+    """
+    cached = stored_commits(repo, 'commit_store', since)
+    if cached is not None:
+        yield from cached
+        return
+    url = f'{API_URL}/repos/{repo}/commits'
+    for page in _iter_pages(url, token, {'since': since.isoformat()}, records.commits_from_page):
+        yield from page
+
+
+def iter_pull_requests(repo, token, state='all'):
+    """Yield a repo's pull requests page by page (see iter_all_issues)."""
+    cached = load_cache(repo, 'pulls', state)
+    if cached is not None:
+        yield from cached
+        return
+    url = f'{API_URL}/repos/{repo}/pulls'
+    for page in _iter_pages(url, token, {'state': state}, records.pull_requests_from_page):
+        yield from page
+
+
+def iter_all_issues_multi(repos, token):
+    """Stream issues from multiple repositories, one repository after another."""
     for repo in repos:
-        all_prs.extend(fetch_pull_requests(repo.strip(), token, state))
-    return all_prs
+        yield from iter_all_issues(repo.strip(), token)
+
+
+def iter_commits_multi(repos, token, since):
+    """Stream commits from multiple repositories since a given date."""
+    for repo in repos:
+        yield from iter_commits(repo.strip(), token, since)
+
+
+def iter_pull_requests_multi(repos, token, state='all'):
+    """Stream pull requests from multiple repositories."""
+    for repo in repos:
+        yield from iter_pull_requests(repo.strip(), token, state)
+
+
+def fetch_issues_updated_since(repo, token, since=None):
+    """Fetch issues (excluding pull requests) updated at or after an ISO timestamp.
+
+    With since=None every issue is returned.
+    """
+    url = f'{API_URL}/repos/{repo}/issues'
+    params = {'state': 'all'}
+    if since:
+        params['since'] = since
+    return _fetch_pages(url, token, params, records.issues_from_page)
+
+
+def fetch_pull_requests_updated_since(repo, token, since=None, state='all'):
+    """Fetch pull requests updated at or after an ISO timestamp.
+
+    The pulls endpoint has no since= filter, so the listing is walked newest
+    update first and stops at the first page that reaches past the timestamp.
+    With since=None every pull request is returned.
+    """
+    url = f'{API_URL}/repos/{repo}/pulls'
+    if not since:
+        return _fetch_pages(url, token, {'state': state}, records.pull_requests_from_page)
+    params = {'state': state, 'sort': 'updated', 'direction': 'desc', 'per_page': 100}
+    batch, links = _get_page(url, token, params, records.pull_requests_from_page)
+    prs = []
+    while True:
+        prs.extend(pr for pr in batch if pr.updated_at >= since)
+        if not batch or batch[-1].updated_at < since or 'next' not in links:
+            return prs
+        batch, links = _get_page(links['next']['url'], token, project=records.pull_requests_from_page)
+
+
+def stored_commits(repo, kind, since, fetch_range=None):
+    """Return a repo's commits committed at or after since, newest first, from the commit store.
+
+    The store (cached under kind) holds commits by sha plus the sorted,
+    disjoint committer-date ranges they are complete for. fetch_range(start,
+    end) is called for each part of [since, now] not covered yet, with
+    end=None for the newest part; the commits it returns are merged in. A
+    newest part shorter than COMMIT_STORE_FRESH_SECONDS is not fetched; when
+    it is, it starts COMMIT_STORE_LOOKBACK_SECONDS before the end of the
+    covered range, to catch commits pushed after that range was fetched. With
+    fetch_range=None nothing is fetched and None is returned unless the
+    window is already covered.
+    """
+    now = datetime.now(timezone.utc)
+    start = iso(since)
+    store = load_cache(repo, kind, max_age_seconds=None) or {'ranges': [], 'commits': {}}
+    fresh = iso(now - timedelta(seconds=COMMIT_STORE_FRESH_SECONDS))
+    gaps = [(lo, hi) if hi is not None else (max(start, lookback(lo)), hi)
+            for lo, hi in _missing_ranges(store['ranges'], start, iso(now))
+            if hi is not None or lo < fresh]
+    if gaps:
+        if fetch_range is None:
+            return None
+        for lo, hi in gaps:
+            for commit in fetch_range(lo, hi):
+                store['commits'][commit.sha] = commit
+        store['ranges'] = _merge_ranges(store['ranges'] + [(lo, hi or iso(now)) for lo, hi in gaps])
+        save_cache(repo, kind, store, pinned=True)
+    commits = [commit for commit in store['commits'].values() if commit_time(commit) >= start]
+    return sorted(commits, key=commit_time, reverse=True)
+
+
+def _missing_ranges(ranges, start, end):
+    """Return the parts of [start, end] not covered by ranges; the part reaching end has hi=None."""
+    gaps = []
+    for lo, hi in ranges:
+        if hi < start or lo > end:
+            continue
+        if lo > start:
+            gaps.append((start, lo))
+        start = max(start, hi)
+    if start < end:
+        gaps.append((start, None))
+    return gaps
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def commit_time(commit):
+    """Return the timestamp commits are windowed and ordered by: the committer date, else the author date."""
+    return commit.committed_at or commit.author_date or ''
+
+
+def iso(moment):
+    """Format a datetime as the UTC 'Z' timestamp GitHub uses, so timestamps compare as strings."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime(_ISO_FORMAT)
+
+
+def parse_iso(timestamp):
+    """Parse a 'Z' timestamp (see iso) into a naive UTC datetime."""
+    return datetime.strptime(timestamp, _ISO_FORMAT)
+
+
+def lookback(timestamp):
+    """Return a 'Z' timestamp moved COMMIT_STORE_LOOKBACK_SECONDS back."""
+    return iso(parse_iso(timestamp) - timedelta(seconds=COMMIT_STORE_LOOKBACK_SECONDS))
+
+
+def months_ago(months):
+    """Return the start of a --months window: midnight UTC, months * 30 days ago."""
+    return (datetime.now(timezone.utc) - timedelta(days=months * 30)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _sync_issues(repo, token):
+    return _sync_items((repo, 'sync_issues', ''), lambda since: fetch_issues_updated_since(repo, token, since))
+
+
+def _sync_pull_requests(repo, token, state):
+    return _sync_items((repo, 'sync_pulls', state), lambda since: fetch_pull_requests_updated_since(repo, token, since, state))
+
+
+def _sync_items(key, fetch_since):
+    """Merge the items changed since the stored high-water mark into the stored set.
+
+    The stored state holds the items by id and the newest updated_at seen.
+    Items are returned newest first, matching the REST listing order. The
+    state is only rewritten when an item is new or has a new updated_at (the
+    items at the high-water mark come back on every sync).
+    """
+    repo, kind, page = key
+    state = load_cache(repo, kind, page, max_age_seconds=None) or {'high_water': None, 'items': {}}
+    items = state['items']
+    high_water = state['high_water']
+    changed = False
+    for item in fetch_since(high_water):
+        old = items.get(item.id)
+        if old is not None and old.updated_at == item.updated_at:
+            continue
+        items[item.id] = item
+        changed = True
+        if high_water is None or item.updated_at > high_water:
+            high_water = item.updated_at
+    if changed:
+        save_cache(repo, kind, {'high_water': high_water, 'items': items}, page, pinned=True)
+    return sorted(items.values(), key=lambda item: item.created_at, reverse=True)
+
+
+def _fetch_multi(fetch, repos, concurrency, *args):
+    """Call fetch(repo, *args) for each repo on a bounded thread pool.
+
+    Results are concatenated in the order the repos were given, regardless of
+    which fetch finishes first. The first error cancels the fetches that have
+    not started yet, makes the running ones stop at their next page and is
+    re-raised once they have returned.
+    """
+    repos = [repo.strip() for repo in repos]
+    if not repos:
+        return []
+    results = [None] * len(repos)
+    workers = max(1, min(concurrency, len(repos)))
+    cancel = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_timed_fetch, fetch, repo, cancel, *args): i for i, repo in enumerate(repos)}
+        try:
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        except BaseException:
+            cancel.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    combined = []
+    for result in results:
+        combined.extend(result)
+    return combined
+
+
+def _fetch_pages(url, token, params, project, concurrency=PAGE_CONCURRENCY):
+    """Fetch every page of a paginated listing and return the items in page order."""
+    items = []
+    for page in _iter_pages(url, token, params, project, concurrency):
+        items.extend(page)
+    return items
+
+
+def _iter_pages(url, token, params, project, concurrency=PAGE_CONCURRENCY):
+    """Yield the pages of a paginated listing in order, as they arrive.
+
+    Each page is passed through project (see records) before it is cached,
+    so only the projected records are ever kept.
+
+    The first page is fetched on its own. If its Link header names a
+    rel="last" page, the remaining pages are fetched in parallel, at most
+    concurrency pages ahead of the consumer; otherwise rel="next" links are
+    followed one by one. No request is made for the empty page past the end.
+    """
+    params = dict(params, per_page=100)
+    body, links = _get_page(url, token, dict(params, page=1), project)
+    yield body
+    last_page = _link_page(links, 'last')
+    if last_page is not None:
+        if last_page > 1:
+            def get(page):
+                return _get_page(url, token, dict(params, page=page), project)[0]
+            yield from _iter_parallel(get, range(2, last_page + 1), concurrency)
+        return
+    while 'next' in links:
+        check_cancelled()
+        body, links = _get_page(links['next']['url'], token, project=project)
+        yield body
+
+
+def check_cancelled():
+    """Raise FetchCancelled if the _fetch_multi call this thread is fetching for has failed.
+
+    Paginating loops call this between pages.
+    """
+    cancel = getattr(_local, 'cancel', None)
+    if cancel is not None and cancel.is_set():
+        raise FetchCancelled("Fetch stopped because another repository failed.")
+
+
+def _timed_fetch(fetch, repo, cancel, *args):
+    _local.cancel = cancel
+    try:
+        with metrics.timer('fetch', repo):
+            return fetch(repo, *args)
+    finally:
+        _local.cancel = None
+
+
+def _iter_parallel(fn, args, concurrency):
+    """Yield fn(arg) for each arg in order, running at most concurrency calls ahead."""
+    args = iter(args)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        pending = deque(executor.submit(fn, arg) for arg in islice(args, concurrency))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                check_cancelled()
+                for arg in islice(args, 1):
+                    pending.append(executor.submit(fn, arg))
+                yield result
+        finally:
+            # Stop fetching if the consumer stops early or a page fails.
+            for future in pending:
+                future.cancel()
+
+
+def _link_page(links, rel):
+    """Return the page number of a Link header entry, or None if it is absent."""
+    link = links.get(rel)
+    if not link:
+        return None
+    page = parse_qs(urlparse(link['url']).query).get('page')
+    return int(page[0]) if page else None
+
+
+def _get_page(url, token, params=None, project=None):
+    """GET a single page and return its projected body and Link header entries.
+
+    The ETag and Last-Modified validators of every page are stored with the
+    page and sent back on the next request for it; a 304 Not Modified reuses
+    the stored page (and does not count against the rate limit).
+    """
+    key = _page_cache_key(url, params)
+    stored = load_cache(*key, max_age_seconds=None)
+    headers = {}
+    if stored:
+        metrics.count('cache.revalidations')
+        if stored['etag']:
+            headers['If-None-Match'] = stored['etag']
+        if stored['last_modified']:
+            headers['If-Modified-Since'] = stored['last_modified']
+    response = _get_response(url, token, params, headers)
+    if response.status_code == 304 and stored:
+        metrics.count('cache.not_modified')
+        return stored['body'], stored['links']
+    body = response.json()
+    if project is not None:
+        body = project(body)
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        repo, kind, page = key
+        save_cache(repo, kind, {
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': body,
+            'links': response.links,
+        }, page)
+    return body, response.links
+
+
+def _page_cache_key(url, params):
+    """Return the (repo, kind, page) cache key of a listing page.
+
+    The repo is taken from the URL path and the page key is the full query
+    string, so a page fetched through a Link URL and through params match.
+    """
+    parsed = urlparse(url)
+    path = parsed.path
+    base = urlparse(API_URL).path.rstrip('/')
+    if base and path.startswith(base + '/'):
+        path = path[len(base):]
+    parts = path.strip('/').split('/')
+    if parts[0] in ('repos', 'orgs', 'users') and len(parts) > 2:
+        owner_len = 3 if parts[0] == 'repos' else 2
+        repo = '/'.join(parts[1:owner_len])
+        endpoint = '/'.join(parts[owner_len:])
+    else:
+        repo, endpoint = '', path
+    query = parse_qsl(parsed.query) + [(k, str(v)) for k, v in (params or {}).items()]
+    return repo, f'page:{endpoint}', urlencode(sorted(query))
 
 
 def github_api_get(url, token, params=None):
+    return _get_response(url, token, params).json()
+
+
+def github_api_post(url, token, payload, resource='core'):
+    """POST a JSON payload (used for GraphQL queries) and return the parsed response."""
+    return _send('post', url, token, resource, json=payload).json()
+
+
+def _get_response(url, token, params=None, extra_headers=None):
+    resource = 'search' if '/search/' in url else 'core'
+    return _send('get', url, token, resource, params=params, extra_headers=extra_headers)
+
+
+def _send(method, url, token, resource, params=None, json=None, extra_headers=None):
+    # Imported here so that commands which never reach the network skip it.
+    import requests
     if token is None or token.strip() == "":
         raise RuntimeError(
             "GitHub token is missing. Please provide a valid personal access token."
         )
     headers = {'Authorization': f'Bearer {token}'}
-    response = requests.get(url, headers=headers, params=params)
+    if extra_headers:
+        headers.update(extra_headers)
+    try:
+        # The scheduler paces requests against the shared rate-limit budget and
+        # retries rate-limited, 5xx and network failures before we see them.
+        response = scheduler.send(
+            lambda: requests.request(method, url, headers=headers, params=params, json=json, timeout=REQUEST_TIMEOUT),
+            resource,
+        )
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise TransientAPIError(f"Could not reach the GitHub API: {e}") from e
     try:
         response.raise_for_status()
     except requests.HTTPError as e:
@@ -114,6 +627,8 @@ def github_api_get(url, token, params=None):
                 f"Forbidden. You may not have permission to access this resource, or you have hit a rate limit. "
                 f"Check your token permissions and GitHub API rate limits."
             ) from e
+        elif response.status_code >= 500:
+            raise TransientAPIError(f"GitHub API error: {response.status_code} {response.reason}") from e
         else:
             raise RuntimeError(f"GitHub API error: {response.status_code} {response.reason}") from e
-    return response.json()
+    return response
@@ -0,0 +1,196 @@
+"""GraphQL fetch backend (--api graphql).
+
+Asks GitHub for only the fields the reports read, lists issues and pull
+requests through their own connections (so no pull requests are downloaded
+with the issues), and pages with cursors at the maximum page size. Returns
+the same records as the REST fetchers in github_api.
+"""
+from collections import Counter
+from datetime import datetime
+from cache_utils import load_cache, save_cache
+import github_api
+import records
+
+# The largest page GitHub allows for a connection.
+PAGE_SIZE = 100
+# Labels fetched per issue; issues with more labels than this are rare.
+LABELS_PER_ISSUE = 50
+
+ISSUES_QUERY = '''
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    items: issues(first: %d, after: $cursor, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId createdAt updatedAt closedAt
+        milestone { title }
+        labels(first: %d) { nodes { name } }
+      }
+    }
+  }
+}
+''' % (PAGE_SIZE, LABELS_PER_ISSUE)
+
+PULL_REQUESTS_QUERY = '''
+query($owner: String!, $name: String!, $cursor: String, $states: [PullRequestState!]) {
+  repository(owner: $owner, name: $name) {
+    items: pullRequests(first: %d, after: $cursor, states: $states, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { databaseId createdAt updatedAt closedAt mergedAt }
+    }
+  }
+}
+''' % PAGE_SIZE
+
+COMMITS_QUERY = '''
+query($owner: String!, $name: String!, $cursor: String, $since: GitTimestamp, $until: GitTimestamp) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          items: history(first: %d, after: $cursor, since: $since, until: $until) {
+            pageInfo { hasNextPage endCursor }
+            nodes { oid committedDate author { name date } }
+          }
+        }
+      }
+    }
+  }
+}
+''' % PAGE_SIZE
+
+LABEL_COUNTS_QUERY = '''
+query($owner: String!, $name: String!, $cursor: String, $states: [IssueState!]) {
+  repository(owner: $owner, name: $name) {
+    items: labels(first: %d, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name issues(states: $states) { totalCount } }
+    }
+  }
+}
+''' % PAGE_SIZE
+
+# REST state names -> GraphQL PullRequestState values (None means all states).
+_PR_STATES = {'all': None, 'open': ['OPEN'], 'closed': ['CLOSED', 'MERGED']}
+_ISSUE_STATES = {'all': None, 'open': ['OPEN'], 'closed': ['CLOSED']}
+
+
+def fetch_all_issues(repo, token):
+    """Fetch all issues (open and closed) from a GitHub repo."""
+    cached = load_cache(repo, 'gql:issues')
+    if cached is not None:
+        return cached
+    issues = [_issue(node) for node in _query_nodes(ISSUES_QUERY, repo, token)]
+    save_cache(repo, 'gql:issues', issues)
+    return issues
+
+
+def fetch_pull_requests(repo, token, state='all'):
+    """Fetch all pull requests from a GitHub repo."""
+    cached = load_cache(repo, 'gql:pulls', state)
+    if cached is not None:
+        return cached
+    prs = [_pull_request(node) for node in _query_nodes(PULL_REQUESTS_QUERY, repo, token, states=_PR_STATES[state])]
+    save_cache(repo, 'gql:pulls', prs, state)
+    return prs
+
+
+def fetch_commits(repo, token, since):
+    """Fetch commits on the default branch since a given date from a GitHub repo.
+
+    Uses the same range-aware commit store as github_api.fetch_commits.
+    """
+    def fetch_range(start, end):
+        nodes = _query_nodes(COMMITS_QUERY, repo, token, since=start, until=end)
+        return [_commit(node) for node in nodes]
+    return github_api.stored_commits(repo, 'gql:commit_store', since, fetch_range)
+
+
+def fetch_label_counts(repo, token, state='all'):
+    """Return a Counter of how many issues carry each label, from each label's issue totalCount."""
+    cached = load_cache(repo, 'gql:label_counts', state)
+    if cached is not None:
+        return cached
+    counts = Counter()
+    for node in _query_nodes(LABEL_COUNTS_QUERY, repo, token, states=_ISSUE_STATES[state]):
+        if node['issues']['totalCount']:
+            counts[node['name']] = node['issues']['totalCount']
+    save_cache(repo, 'gql:label_counts', counts, state)
+    return counts
+
+
+def graphql_query(query, variables, token):
+    """Run a GraphQL query and return its data, turning GraphQL errors into RuntimeErrors."""
+    result = github_api.github_api_post(f'{github_api.API_URL}/graphql', token, {'query': query, 'variables': variables}, resource='graphql')
+    errors = result.get('errors')
+    if errors:
+        if any(error.get('type') == 'NOT_FOUND' for error in errors):
+            raise RuntimeError(
+                "Repository not found or access denied. "
+                "Check that the repository name is correct and that your token has access to private repositories (scope: 'repo')."
+            )
+        raise RuntimeError(f"GitHub GraphQL error: {errors[0].get('message', errors[0])}")
+    return result['data']
+
+
+def _query_nodes(query, repo, token, **variables):
+    """Follow the cursor of the query's `items` connection and return every node."""
+    owner, name = repo.split('/', 1)
+    variables = dict(variables, owner=owner, name=name, cursor=None)
+    nodes = []
+    while True:
+        github_api.check_cancelled()
+        connection = _find_items(graphql_query(query, variables, token)['repository'])
+        if connection is None:
+            # An empty repository has no default branch (and so no history).
+            return nodes
+        nodes.extend(connection['nodes'])
+        if not connection['pageInfo']['hasNextPage']:
+            return nodes
+        variables['cursor'] = connection['pageInfo']['endCursor']
+
+
+def _find_items(data):
+    """Return the connection aliased `items`, wherever it sits in the response."""
+    if not isinstance(data, dict):
+        return None
+    if 'items' in data:
+        return data['items']
+    for value in data.values():
+        found = _find_items(value)
+        if found is not None:
+            return found
+    return None
+
+
+def _issue(node):
+    return records.Issue(
+        node['databaseId'],
+        node['createdAt'],
+        node['updatedAt'],
+        node['closedAt'],
+        tuple(label['name'] for label in node['labels']['nodes']),
+        (node['milestone'] or {}).get('title'),
+    )
+
+
+def _pull_request(node):
+    return records.PullRequest(
+        node['databaseId'],
+        node['createdAt'],
+        node['updatedAt'],
+        node['closedAt'],
+        node['mergedAt'],
+    )
+
+
+def _commit(node):
+    author = node['author'] or {}
+    return records.Commit(node['oid'], author.get('name'), _utc(author.get('date')), _utc(node['committedDate']))
+
+
+def _utc(timestamp):
+    """Normalize a GitTimestamp (which carries the author's UTC offset) to the REST 'Z' form."""
+    if not timestamp:
+        return None
+    return github_api.iso(datetime.fromisoformat(timestamp))
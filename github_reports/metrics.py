@@ -0,0 +1,107 @@
+"""Run metrics for --timings.
+
+Commands mark their phases with lap() (each lap runs until the next one or
+the end of the run), fetches time themselves per repo with timer(), and the
+HTTP, cache and scheduler code bumps counters with count(). Counter names are
+dotted ('http.requests', 'cache.hits') and come out nested in the JSON
+report. Everything is a no-op until enable() is called.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import json
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+_enabled = False
+_started = None
+_lap = None
+_phases = defaultdict(float)
+_repos = defaultdict(lambda: defaultdict(float))
+_counters = Counter()
+
+
+def enable():
+    global _enabled, _started
+    _enabled = True
+    _started = time.perf_counter()
+
+
+def count(name, amount=1):
+    if _enabled:
+        with _lock:
+            _counters[name] += amount
+
+
+def lap(name):
+    """End the current phase (if any) and start the phase name."""
+    global _lap
+    if not _enabled:
+        return
+    now = time.perf_counter()
+    with _lock:
+        if _lap is not None:
+            _phases[_lap[0]] += now - _lap[1]
+        _lap = (name, now) if name else None
+
+
+@contextmanager
+def timer(name, repo):
+    """Time the body of the with-block as phase name of repo."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _repos[repo][name] += time.perf_counter() - start
+
+
+def report(command=None):
+    """Return the metrics collected so far as a JSON-serializable dict."""
+    from rate_limit import scheduler
+    lap(None)
+    with _lock:
+        counters = {}
+        for name, value in sorted(_counters.items()):
+            *path, leaf = name.split('.')
+            node = counters
+            for part in path:
+                node = node.setdefault(part, {})
+            node[leaf] = value
+        return {
+            'command': command,
+            'wall_seconds': time.perf_counter() - _started,
+            'phases': dict(_phases),
+            'repos': {repo: dict(phases) for repo, phases in _repos.items()},
+            **counters,
+            'rate_limit_remaining': {r: scheduler.remaining(r) for r in ('core', 'search', 'graphql')},
+            'peak_memory_bytes': _peak_memory(),
+        }
+
+
+def write(path, command=None):
+    """Write report() as JSON to path ('-' for stdout)."""
+    text = json.dumps(report(command), indent=2)
+    if path == '-':
+        sys.stdout.write(text + '\n')
+    else:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+
+
+def _peak_memory():
+    """Peak resident memory of this process and of its largest child (the render pool), or None where unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
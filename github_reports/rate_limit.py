@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+import metrics
+
+
+# Requests kept in hand per resource; below this the scheduler starts spacing requests out.
+RESERVE = 100
+# Attempts made for a request that keeps failing transiently or hitting secondary limits.
+MAX_RETRIES = 6
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+# (connect, read) timeout of each request, so a stalled connection is retried instead of hanging.
+REQUEST_TIMEOUT = (10, 60)
+
+
+class RequestScheduler:
+    """Shares one GitHub rate-limit budget between every thread making requests.
+
+    The X-RateLimit-* headers of each response update the budget of its
+    resource (core, search, graphql). Once fewer than RESERVE requests are
+    left, requests are spread evenly over the time until the reset; at zero
+    they wait for the reset. While the budget of a resource is unknown (at
+    the start and after a reset) only one request is sent, to learn it. Retry-After, secondary rate limits, 5xx responses
+    and network errors are retried with jittered exponential backoff, and a
+    backoff pauses every thread, not just the one that was throttled.
+    """
+
+    def __init__(self, reserve=RESERVE, max_retries=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._budgets = {}
+        # Per resource, the earliest time the next paced request may start.
+        self._next_slot = {}
+        # Resources with a request out to learn their budget, and those whose responses carry none.
+        self._probing = set()
+        self._unmetered = set()
+        self._probe_done = threading.Condition(self._lock)
+        self._paused_until = 0.0
+
+    def send(self, request, resource='core'):
+        """Call request() (which returns a requests.Response) under the shared budget.
+
+        Returns the final response, which may still be an error response once
+        the retries are used up. Network errors from the last attempt are
+        re-raised.
+        """
+        import requests
+        for attempt in range(self.max_retries):
+            probe = self._wait_for_slot(resource)
+            response = None
+            try:
+                response = request()
+                self.update(response)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.count('http.network_errors')
+                if attempt == self.max_retries - 1:
+                    raise
+                self._backoff(attempt)
+                continue
+            finally:
+                if probe:
+                    self._end_probe(resource, response)
+            metrics.count('http.requests')
+            metrics.count('http.bytes', len(response.content))
+            metrics.count(f'http.status.{response.status_code}')
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == self.max_retries - 1:
+                return response
+            metrics.count('http.retries')
+            self._pause(delay)
+        return response
+
+    def update(self, response):
+        """Record the rate-limit headers of a response."""
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        try:
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset = float(headers.get('X-RateLimit-Reset', 0))
+        except ValueError:
+            return
+        with self._lock:
+            budget = self._budgets.get(resource)
+            if budget and budget[1] == reset:
+                # Responses of requests sent earlier can report more than the slots already claimed.
+                remaining = min(remaining, budget[0])
+            self._budgets[resource] = [remaining, reset]
+
+    def remaining(self, resource='core'):
+        """Return the last known remaining request count for a resource, or None."""
+        with self._lock:
+            budget = self._budgets.get(resource)
+            return budget[0] if budget else None
+
+    def _wait_for_slot(self, resource):
+        """Wait until a request for resource may be sent; return True if it is the probe of an unknown budget."""
+        while True:
+            with self._lock:
+                while resource in self._probing:
+                    self._probe_done.wait()
+                now = time.time()
+                delay = max(0.0, self._paused_until - now)
+                budget = self._budgets.get(resource)
+                if budget and budget[1] <= now:
+                    # The window has rolled over; the next response will tell us the new budget.
+                    del self._budgets[resource]
+                    self._next_slot.pop(resource, None)
+                    budget = None
+                if budget is None:
+                    probe = resource not in self._unmetered
+                    if probe:
+                        self._probing.add(resource)
+                    break
+                remaining, reset = budget
+                if remaining > 0:
+                    if remaining < self.reserve:
+                        # Slots are handed out one interval apart across all threads,
+                        # so concurrent fetchers share the pace instead of each keeping it.
+                        slot = max(now, self._next_slot.get(resource, 0.0))
+                        self._next_slot[resource] = slot + (reset - slot) / remaining
+                        delay = max(delay, slot - now)
+                    # Claim the slot now so concurrent threads see the reduced budget.
+                    budget[0] = remaining - 1
+                    probe = False
+                    break
+            # Out of requests: wait for the reset, then queue up again for the new budget.
+            time.sleep(max(delay, reset - now + 1))
+        if delay > 0:
+            time.sleep(delay)
+        return probe
+
+    def _end_probe(self, resource, response):
+        with self._lock:
+            self._probing.discard(resource)
+            if response is not None and resource not in self._budgets:
+                # No rate-limit headers (e.g. GitHub Enterprise without limits): stop probing.
+                self._unmetered.add(resource)
+            self._probe_done.notify_all()
+
+    def _retry_delay(self, response, attempt):
+        """Return how long to wait before retrying a response, or None if it should not be retried."""
+        status = response.status_code
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None and status in (403, 429):
+            try:
+                return float(retry_after)
+            except ValueError:
+                return self._jitter(attempt)
+        if status == 403 or status == 429:
+            if response.headers.get('X-RateLimit-Remaining') == '0':
+                reset = float(response.headers.get('X-RateLimit-Reset', 0))
+                return max(reset - time.time(), 0) + 1
+            if status == 429 or 'secondary rate limit' in response.text.lower():
+                return self._jitter(attempt)
+            return None
+        if status >= 500:
+            return self._jitter(attempt)
+        return None
+
+    def _jitter(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _backoff(self, attempt):
+        self._pause(self._jitter(attempt))
+
+    def _pause(self, delay):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + delay)
+        time.sleep(delay)
+
+
+# The scheduler shared by every request this process makes.
+scheduler = RequestScheduler()
@@ -0,0 +1,83 @@
+"""Compact records holding only the fields the reports read.
+
+GitHub's REST objects carry users, reactions, bodies and dozens of URLs;
+the fetchers project each page down to these records before it is cached
+or returned. Timestamps stay as the ISO strings GitHub sends
+('2024-01-31T12:00:00Z'), with None for missing values.
+"""
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __reduce__(self):
+        # Pickle as a flat tuple rather than a per-object slot dict.
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{self.__class__.__name__}({fields})'
+
+
+class Issue(_Record):
+    __slots__ = ('id', 'created_at', 'updated_at', 'closed_at', 'labels', 'milestone')
+
+    @classmethod
+    def from_json(cls, issue):
+        return cls(
+            issue['id'],
+            issue['created_at'],
+            issue['updated_at'],
+            issue.get('closed_at'),
+            tuple(label['name'] for label in issue.get('labels', [])),
+            (issue.get('milestone') or {}).get('title'),
+        )
+
+
+class PullRequest(_Record):
+    __slots__ = ('id', 'created_at', 'updated_at', 'closed_at', 'merged_at')
+
+    @classmethod
+    def from_json(cls, pr):
+        return cls(
+            pr['id'],
+            pr['created_at'],
+            pr['updated_at'],
+            pr.get('closed_at'),
+            pr.get('merged_at'),
+        )
+
+
+class Commit(_Record):
+    __slots__ = ('sha', 'author_name', 'author_date', 'committed_at')
+
+    @classmethod
+    def from_json(cls, commit):
+        author = (commit.get('commit') or {}).get('author') or {}
+        committer = (commit.get('commit') or {}).get('committer') or {}
+        return cls(commit['sha'], author.get('name'), author.get('date'), committer.get('date'))
+
+
+def issues_from_page(page):
+    """Project a page of the issues listing, dropping the pull requests it includes."""
+    return [Issue.from_json(issue) for issue in page if 'pull_request' not in issue]
+
+
+def pull_requests_from_page(page):
+    return [PullRequest.from_json(pr) for pr in page]
+
+
+def commits_from_page(page):
+    return [Commit.from_json(commit) for commit in page]
+
+
+def label_names_from_page(page):
+    return [label['name'] for label in page]
+
+
+def repo_names_from_page(page):
+    return [repo['full_name'] for repo in page]
@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+import os
+
+
+# Output formats the CLI offers; matplotlib picks the format from the file extension.
+FORMATS = ('png', 'svg')
+
+_pyplot = None
+
+
+def pyplot():
+    """Return matplotlib.pyplot, importing it on first use.
+
+    matplotlib is only imported once a chart is actually drawn, so --help,
+    usage errors and fetch-only work do not pay for it. Charts are only ever
+    written to files, so the non-interactive Agg backend is pinned instead of
+    letting matplotlib probe for a GUI toolkit.
+    """
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot
+        _pyplot = matplotlib.pyplot
+    return _pyplot
+
+
+@contextmanager
+def figure(output, figsize, dpi=None, format=None):
+    """Create a figure for the body of the with-block, then save it to output and close it.
+
+    The figure is closed even if plotting fails, so batch and long-running
+    processes do not accumulate figures. dpi=None keeps matplotlib's default;
+    format is only needed when output is a file object rather than a path.
+    """
+    plt = pyplot()
+    fig = plt.figure(figsize=figsize)
+    try:
+        yield fig
+        fig.tight_layout()
+        fig.savefig(output, dpi=dpi if dpi else 'figure', format=format)
+    finally:
+        plt.close(fig)
+
+
+def render_charts(jobs, workers=None):
+    """Render chart jobs, in parallel across processes when workers > 1.
+
+    Each job is (plot function name in utils, args, kwargs). workers=None uses
+    one process per core (capped at the number of jobs); workers=1 renders in
+    this process.
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            _render_job(job)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # list() surfaces the first exception raised by a worker.
+        list(executor.map(_render_job, jobs))
+
+
+def _render_job(job):
+    import utils
+    name, args, kwargs = job
+    getattr(utils, name)(*args, **kwargs)
@@ -0,0 +1,295 @@
+"""Persisted per-repo rollups (--rollup).
+
+Each repository keeps small pre-aggregated tables in the cache instead of
+raw item lists:
+
+- issues: opened and closed counts per day, label counts (split by open or
+  closed) and a resolution-time histogram sketch
+- pull requests: opened, closed and merged counts per %Y-%W week
+- commits: commit counts per author per day, summed into weeks when read
+
+They are brought up to date incrementally: issues and pull requests with the
+items updated since the newest updated_at seen, commits with the commits
+committed since a week before the newest one seen (and older ones when a
+longer window is asked for). Issues and pull requests change after they are
+counted (closed, reopened, relabelled), so each also keeps a ledger of what
+every item contributed; it is only loaded when there are changes to apply,
+and it is written together with the rollup so that the two always match.
+The items updated exactly at the newest updated_at are remembered too,
+because the since= filter is inclusive and returns them again on every
+update. Days and weeks are whole UTC days, so burndown windows are
+day-aligned.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import math
+import uuid
+from cache_utils import load_cache, save_cache, save_cache_entries
+import github_api
+import metrics
+
+# Relative accuracy of the resolution-time sketch: bucket i holds times in
+# (RESOLUTION_GAMMA ** (i - 1), RESOLUTION_GAMMA ** i] days.
+RESOLUTION_GAMMA = 1.02
+# Times this short (about a second) share one bucket with zero.
+_MIN_RESOLUTION_DAYS = 1e-5
+
+
+def issue_rollup(repo, token):
+    """Return the issue rollup of a repo, updated with the issues changed since the last update."""
+    return _update(repo, 'rollup:issues', lambda since: github_api.fetch_issues_updated_since(repo, token, since),
+                   ('opened', 'closed', 'labels', 'resolution'), _issue_entry, _add_issue)
+
+
+def pull_request_rollup(repo, token):
+    """Return the pull request rollup of a repo, updated with the pull requests changed since the last update."""
+    return _update(repo, 'rollup:pulls', lambda since: github_api.fetch_pull_requests_updated_since(repo, token, since),
+                   ('opened', 'closed', 'merged'), _pull_request_entry, _add_pull_request)
+
+
+def commit_rollup(repo, token, since):
+    """Return the commit rollup of a repo, covering at least the commits since a given date.
+
+    Commits never change, so no ledger is needed. Commits before the covered
+    window are fetched when since reaches further back. At the newest end,
+    commits are refetched from github_api.COMMIT_STORE_LOOKBACK_SECONDS before
+    the newest one counted, because a commit can be pushed after its committer
+    date. The shas counted in that trailing window are kept so that refetched
+    commits are not counted twice.
+    """
+    start = github_api.iso(since)
+    rollup = load_cache(repo, 'rollup:commits', max_age_seconds=None)
+    if rollup is None:
+        rollup = {'start': start, 'high_water': None, 'recent': {}, 'daily': Counter()}
+    elif start < rollup['start']:
+        older = github_api.fetch_commits_between(repo, token, start, rollup['start'])
+        _add_commits(rollup, [c for c in older if github_api.commit_time(c) < rollup['start'] and c.sha not in rollup['recent']])
+        rollup['start'] = start
+    fetch_since = rollup['start']
+    if rollup['high_water'] is not None:
+        fetch_since = max(fetch_since, github_api.lookback(rollup['high_water']))
+    newer = github_api.fetch_commits_between(repo, token, fetch_since)
+    _add_commits(rollup, [c for c in newer if github_api.commit_time(c) >= rollup['start'] and c.sha not in rollup['recent']])
+    if rollup['high_water'] is not None:
+        cutoff = github_api.lookback(rollup['high_water'])
+        rollup['recent'] = {sha: committed for sha, committed in rollup['recent'].items() if committed >= cutoff}
+    save_cache(repo, 'rollup:commits', rollup, pinned=True)
+    return rollup
+
+
+def issue_rollup_multi(repos, token, concurrency=github_api.DEFAULT_CONCURRENCY):
+    """Update the issue rollups of several repos in parallel and return their sum."""
+    return _combine(_update_multi(issue_rollup, repos, concurrency, token))
+
+
+def pull_request_rollup_multi(repos, token, concurrency=github_api.DEFAULT_CONCURRENCY):
+    """Update the pull request rollups of several repos in parallel and return their sum."""
+    return _combine(_update_multi(pull_request_rollup, repos, concurrency, token))
+
+
+def commit_rollup_multi(repos, token, since, concurrency=github_api.DEFAULT_CONCURRENCY):
+    """Update the commit rollups of several repos in parallel and return their sum."""
+    return _combine(_update_multi(commit_rollup, repos, concurrency, token, since))
+
+
+def burndown_data(rollup, since=None, until=None):
+    """Return daily open/closed issue counts for burndown chart, as utils.burndown_data_from_issues does."""
+    opened, closed = rollup['opened'], rollup['closed']
+    since_day = since.date().isoformat() if since else None
+    until_day = None
+    if until is not None:
+        # Issues created later on the day of a midnight until are after it.
+        last_day = until.date() - timedelta(days=1) if until.time() == datetime.min.time() else until.date()
+        until_day = last_day.isoformat()
+    # Issues closed before the window could only have been created before it as well.
+    total = sum(n for day, n in opened.items() if until_day is None or day <= until_day)
+    total -= sum(n for day, n in closed.items() if since_day and day < since_day)
+    if total <= 0:
+        return [], [], []
+    start = since if since is not None else datetime.fromisoformat(min(opened))
+    end = until if until is not None else datetime.fromisoformat(max(max(opened), max(closed, default='')))
+    days = max((end - start).days + 1, 0)
+    date_range = [start + timedelta(days=i) for i in range(days)]
+    closed_counts = [closed.get(day.date().isoformat(), 0) for day in date_range]
+    open_counts = []
+    remaining = total
+    for count in closed_counts:
+        remaining -= count
+        open_counts.append(remaining)
+    return date_range, open_counts, closed_counts
+
+
+def issue_type_breakdown_data(rollup, state='all'):
+    """Return a Counter of issue labels, optionally only of 'open' or 'closed' issues."""
+    counter = Counter()
+    for (label, is_open), count in rollup['labels'].items():
+        if state == 'all' or is_open == (state == 'open'):
+            counter[label] += count
+    return counter
+
+
+def issue_resolution_time_data(rollup):
+    """Return (times, weights): resolution times in days and how many closed issues each stands for."""
+    # The None bucket (times of about zero) sorts first.
+    buckets = sorted(rollup['resolution'].items(), key=lambda item: -math.inf if item[0] is None else item[0])
+    times = [0.0 if i is None else 2 * RESOLUTION_GAMMA ** i / (RESOLUTION_GAMMA + 1) for i, _ in buckets]
+    return times, [count for _, count in buckets]
+
+
+def pr_activity_timeline_data(rollup):
+    """Return weekly counts of PRs opened, closed, and merged, as utils.pr_activity_timeline_data does."""
+    weeks = sorted(set(rollup['opened']) | set(rollup['closed']) | set(rollup['merged']))
+    return (weeks, *([rollup[field].get(week, 0) for week in weeks] for field in ('opened', 'closed', 'merged')))
+
+
+def commit_summary_weekly_data(rollup, since):
+    """Return weekly commit counts per user and week labels, for commits authored since a given date.
+
+    Weeks run Monday to Monday (UTC) from the week of the first commit;
+    authors are ordered by their number of commits.
+    """
+    since_day = since.date().isoformat()
+    daily = {key: n for key, n in rollup['daily'].items() if key[1] >= since_day}
+    if not daily:
+        return {}, []
+    first_day = datetime.fromisoformat(min(day for _, day in daily)).date()
+    first_week = first_day - timedelta(days=first_day.weekday())
+    n_weeks = (datetime.fromisoformat(max(day for _, day in daily)).date() - first_week).days // 7 + 1
+    totals = Counter()
+    user_week_counts = {}
+    for (author, day), count in daily.items():
+        week = (datetime.fromisoformat(day).date() - first_week).days // 7
+        user_week_counts.setdefault(author, [0] * n_weeks)[week] += count
+        totals[author] += count
+    week_labels = [(first_week + timedelta(days=7 * i)).strftime('%Y-%m-%d') for i in range(n_weeks)]
+    return {author: user_week_counts[author] for author, _ in totals.most_common()}, week_labels
+
+
+def _update(repo, kind, fetch_since, fields, entry, add):
+    """Bring a ledgered rollup up to date with the items fetch_since(high_water) returns.
+
+    The rollup and its ledger carry the same generation stamp and are written
+    in one transaction. A ledger that is missing or from another generation
+    means the counts can no longer be corrected, so the rollup is rebuilt
+    from every item. If another process saved the rollup in the meantime,
+    this update is not written (that process's rollup is kept).
+    """
+    rollup = load_cache(repo, kind, max_age_seconds=None) or _new_rollup(fields)
+    generation = rollup['generation']
+    changed = _unseen(rollup, fetch_since(rollup['high_water']))
+    if not changed:
+        return rollup
+    ledger = {}
+    if generation is not None:
+        stored = load_cache(repo, kind, 'ledger', max_age_seconds=None)
+        if stored is not None and stored['generation'] == generation:
+            ledger = stored['items']
+        else:
+            rollup = _new_rollup(fields)
+            changed = fetch_since(None)
+    _apply_changes(rollup, ledger, changed, entry, add)
+    rollup['generation'] = uuid.uuid4().hex
+    save_cache_entries(
+        [(repo, kind, '', rollup), (repo, kind, 'ledger', {'generation': rollup['generation'], 'items': ledger})],
+        pinned=True,
+        check=lambda: (load_cache(repo, kind, max_age_seconds=None) or {}).get('generation') == generation,
+    )
+    return rollup
+
+
+def _new_rollup(fields):
+    return {'generation': None, 'high_water': None, 'boundary': set(), **{field: Counter() for field in fields}}
+
+
+def _apply_changes(rollup, ledger, changed, entry, add):
+    """Replace the ledger entries of changed items, moving their contribution in the rollup."""
+    for item in changed:
+        old = ledger.get(item.id)
+        if old is not None:
+            add(rollup, old, -1)
+        ledger[item.id] = entry(item)
+        add(rollup, ledger[item.id], 1)
+        if rollup['high_water'] is None or item.updated_at > rollup['high_water']:
+            rollup['high_water'] = item.updated_at
+            rollup['boundary'] = set()
+        if item.updated_at == rollup['high_water']:
+            rollup['boundary'].add((item.id, item.updated_at))
+
+
+def _unseen(rollup, changed):
+    """Drop the items already applied at the high-water mark, which since= returns again."""
+    return [item for item in changed if (item.id, item.updated_at) not in rollup['boundary']]
+
+
+def _issue_entry(issue):
+    closed_day = issue.closed_at[:10] if issue.closed_at else None
+    resolution = None
+    if issue.closed_at:
+        days = (github_api.parse_iso(issue.closed_at) - github_api.parse_iso(issue.created_at)).total_seconds() / 86400
+        resolution = _resolution_bucket(days)
+    return issue.created_at[:10], closed_day, issue.labels, resolution
+
+
+def _add_issue(rollup, entry, sign):
+    created_day, closed_day, labels, resolution = entry
+    _bump(rollup['opened'], created_day, sign)
+    if closed_day is not None:
+        _bump(rollup['closed'], closed_day, sign)
+        _bump(rollup['resolution'], resolution, sign)
+    for label in labels:
+        _bump(rollup['labels'], (label, closed_day is None), sign)
+
+
+def _pull_request_entry(pr):
+    return tuple(github_api.parse_iso(ts).strftime('%Y-%W') if ts else None for ts in (pr.created_at, pr.closed_at, pr.merged_at))
+
+
+def _add_pull_request(rollup, entry, sign):
+    for field, week in zip(('opened', 'closed', 'merged'), entry):
+        if week is not None:
+            _bump(rollup[field], week, sign)
+
+
+def _add_commits(rollup, commits):
+    """Count commits and remember their shas, moving the high-water mark up to the newest."""
+    for commit in commits:
+        committed = github_api.commit_time(commit)
+        rollup['recent'][commit.sha] = committed
+        if rollup['high_water'] is None or committed > rollup['high_water']:
+            rollup['high_water'] = committed
+        if commit.author_date:
+            rollup['daily'][(commit.author_name, commit.author_date[:10])] += 1
+
+
+def _resolution_bucket(days):
+    if days <= _MIN_RESOLUTION_DAYS:
+        return None
+    return math.ceil(math.log(days) / math.log(RESOLUTION_GAMMA))
+
+
+def _bump(counter, key, sign):
+    counter[key] += sign
+    if not counter[key]:
+        del counter[key]
+
+
+def _update_multi(update, repos, concurrency, *args):
+    repos = [repo.strip() for repo in repos]
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(repos)))) as executor:
+        return list(executor.map(lambda repo: _timed_update(update, repo, *args), repos))
+
+
+def _timed_update(update, repo, *args):
+    with metrics.timer('rollup', repo):
+        return update(repo, *args)
+
+
+def _combine(rollups):
+    """Sum the counters of several rollups of the same kind."""
+    combined = {}
+    for rollup in rollups:
+        for field, value in rollup.items():
+            if isinstance(value, Counter):
+                combined.setdefault(field, Counter()).update(value)
+    return combined
@@ -0,0 +1,333 @@
+"""Long-running report server (the serve command).
+
+Holds the issues, pull requests and commits of a fixed set of repos in
+memory and renders reports from them on request, so a chart costs neither
+Python startup nor cache unpickling. A background thread refreshes the data
+every refresh interval with incremental syncs. POST /refresh?repo=owner/repo
+and GitHub webhooks (POST /webhook) refresh one repo right away. Rendered
+charts are kept until the data of one of their repos changes.
+
+    GET  /                                   status of every repo (JSON)
+    GET  /reports/<report>.<png|svg>?repo=…  a chart, for some or all repos
+    POST /refresh?repo=owner/repo            refresh one repo now
+    POST /webhook                            GitHub webhook (X-Hub-Signature-256 checked if a secret is set)
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import hashlib
+import hmac
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import threading
+import time
+from urllib.parse import parse_qsl, urlparse
+import github_api
+import render
+import utils
+
+REPORTS = ('burndown', 'commit-summary', 'issue-type-breakdown', 'pr-activity-timeline', 'issue-resolution-time')
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+DEFAULT_REFRESH_INTERVAL = 300
+# Rendered charts kept in memory; the least recently served are dropped first.
+CHART_CACHE_SIZE = 256
+
+
+class BadRequest(ValueError):
+    """A report request with an unknown report, repo or parameter."""
+
+
+class ReportStore:
+    """The datasets of a fixed set of repos, held in memory and refreshed in the background.
+
+    Each repo has a version that changes whenever a refresh brings in
+    different data; rendered charts are keyed on the versions of their repos.
+    """
+
+    def __init__(self, repos, token, months=3, concurrency=github_api.DEFAULT_CONCURRENCY,
+                 interval=DEFAULT_REFRESH_INTERVAL, log=print):
+        self.repos = list(repos)
+        self.token = token
+        self.months = months
+        self.concurrency = concurrency
+        self.interval = interval
+        self.log = log
+        self._lock = threading.Lock()
+        self._data = {}
+        self._fingerprints = {}
+        self._versions = {repo: 0 for repo in self.repos}
+        self._refreshed = {}
+        self._errors = {}
+        self._pending = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def refresh(self, repo):
+        """Fetch one repo's datasets (incrementally) and swap them in; errors keep the old data."""
+        since = github_api.months_ago(self.months)
+        try:
+            data = {
+                'issues': github_api.fetch_all_issues(repo, self.token, sync=True),
+                'prs': github_api.fetch_pull_requests(repo, self.token, sync=True),
+                'commits': github_api.fetch_commits(repo, self.token, since),
+            }
+        except Exception as e:
+            # Any failure (API, network, bad payload) keeps the old data and shows up in the status.
+            with self._lock:
+                self._errors[repo] = str(e) or type(e).__name__
+            self.log(f"Error refreshing {repo}: {e!r}")
+            return
+        fingerprint = _fingerprint(data)
+        with self._lock:
+            self._data[repo] = data
+            if fingerprint != self._fingerprints.get(repo):
+                self._fingerprints[repo] = fingerprint
+                self._versions[repo] += 1
+            self._refreshed[repo] = time.time()
+            self._errors.pop(repo, None)
+
+    def refresh_all(self):
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(self.repos)))) as executor:
+            list(executor.map(self.refresh, self.repos))
+
+    def request_refresh(self, repo):
+        """Queue a repo for the background thread to refresh as soon as possible."""
+        with self._lock:
+            self._pending.add(repo)
+        self._wake.set()
+
+    def run(self):
+        """Refresh every repo each interval and queued repos as they arrive, until stop()."""
+        next_full = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            self._wake.wait(max(0.0, next_full - time.monotonic()))
+            self._wake.clear()
+            try:
+                with self._lock:
+                    pending, self._pending = self._pending, set()
+                for repo in pending:
+                    self.refresh(repo)
+                if time.monotonic() >= next_full:
+                    self.refresh_all()
+            except Exception as e:
+                # The refresh thread must outlive any one bad pass.
+                self.log(f"Error in background refresh: {e!r}")
+            if time.monotonic() >= next_full:
+                next_full = time.monotonic() + self.interval
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def versions(self, repos):
+        """Return the current versions of repos, without copying their data."""
+        with self._lock:
+            self._check_loaded(repos)
+            return tuple(self._versions[repo] for repo in repos)
+
+    def snapshot(self, repos):
+        """Return the combined datasets of repos and their versions."""
+        with self._lock:
+            self._check_loaded(repos)
+            data = {name: [item for repo in repos for item in self._data[repo][name]] for name in ('issues', 'prs', 'commits')}
+            return data, tuple(self._versions[repo] for repo in repos)
+
+    def _check_loaded(self, repos):
+        missing = [repo for repo in repos if repo not in self._data]
+        if missing:
+            raise BadRequest(f"No data loaded for {', '.join(missing)}")
+
+    def status(self):
+        with self._lock:
+            return {repo: {
+                'version': self._versions[repo],
+                'refreshed_at': self._refreshed.get(repo),
+                'issues': len(self._data[repo]['issues']) if repo in self._data else None,
+                'pull_requests': len(self._data[repo]['prs']) if repo in self._data else None,
+                'commits': len(self._data[repo]['commits']) if repo in self._data else None,
+                'error': self._errors.get(repo),
+            } for repo in self.repos}
+
+
+class ReportServer(ThreadingHTTPServer):
+    """HTTP front end of a ReportStore (see the module docstring for the routes)."""
+
+    daemon_threads = True
+
+    def __init__(self, address, store, dpi=None, webhook_secret=None):
+        super().__init__(address, _Handler)
+        self.store = store
+        self.dpi = dpi
+        self.webhook_secret = webhook_secret
+        self._charts = OrderedDict()
+        self._charts_lock = threading.Lock()
+        # pyplot keeps global state, so charts are drawn one at a time.
+        self._render_lock = threading.Lock()
+
+    def chart(self, name, fmt, query):
+        """Return the bytes of a chart, rendering it unless an up-to-date copy is cached."""
+        if name not in REPORTS or fmt not in CONTENT_TYPES:
+            raise BadRequest(f"Unknown report {name}.{fmt}")
+        repos = [r.strip() for r in query.pop('repo', '').split(',') if r.strip()] or self.store.repos
+        unknown = [repo for repo in repos if repo not in self.store.repos]
+        if unknown:
+            raise BadRequest(f"Not served: {', '.join(unknown)}")
+        key = (name, fmt, tuple(repos), tuple(sorted(query.items())))
+        versions = self.store.versions(repos)
+        with self._charts_lock:
+            cached = self._charts.get(key)
+            if cached and cached[0] == versions:
+                self._charts.move_to_end(key)
+                return cached[1]
+        # Only a miss pays for copying the items; a refresh since may have moved the versions on.
+        data, versions = self.store.snapshot(repos)
+        output = io.BytesIO()
+        with self._render_lock:
+            _plot(name, data, query, output, fmt, ', '.join(repos), self.dpi, self.store.months)
+        body = output.getvalue()
+        with self._charts_lock:
+            self._charts[key] = (versions, body)
+            self._charts.move_to_end(key)
+            while len(self._charts) > CHART_CACHE_SIZE:
+                self._charts.popitem(last=False)
+        return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'github-reports'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = dict(parse_qsl(parsed.query))
+        if parsed.path in ('/', '/status'):
+            return self._send_json(200, {'reports': list(REPORTS), 'repos': self.server.store.status()})
+        if parsed.path.startswith('/reports/'):
+            name, _, fmt = parsed.path[len('/reports/'):].rpartition('.')
+            try:
+                body = self.server.chart(name, fmt, query)
+            except BadRequest as e:
+                return self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                self.server.store.log(f"Error rendering {parsed.path}: {e!r}")
+                return self._send_json(500, {'error': str(e) or type(e).__name__})
+            return self._send(200, body, CONTENT_TYPES[fmt])
+        self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if parsed.path == '/refresh':
+            repo = dict(parse_qsl(parsed.query)).get('repo')
+        elif parsed.path == '/webhook':
+            if not self._signature_ok(body):
+                return self._send_json(401, {'error': 'Bad signature'})
+            try:
+                repo = (json.loads(body or b'{}').get('repository') or {}).get('full_name')
+            except ValueError:
+                return self._send_json(400, {'error': 'Invalid JSON'})
+        else:
+            return self._send_json(404, {'error': 'Not found'})
+        if repo not in self.server.store.repos:
+            return self._send_json(404, {'error': f'Not served: {repo}'})
+        self.server.store.request_refresh(repo)
+        self._send_json(202, {'refreshing': repo})
+
+    def _signature_ok(self, body):
+        secret = self.server.webhook_secret
+        if not secret:
+            return True
+        expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, self.headers.get('X-Hub-Signature-256', ''))
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, indent=2).encode(), 'application/json')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _plot(name, data, query, output, fmt, repo_name, dpi, months):
+    """Draw one report from in-memory datasets, taking its options from the query string."""
+    kwargs = {'repo_name': repo_name, 'dpi': dpi, 'format': fmt}
+    if name == 'burndown':
+        since, until = _date(query, 'since'), _date(query, 'until')
+        utils.plot_burndown(*utils.burndown_data_from_issues(data['issues'], since, until, query.get('milestone')), output, **kwargs)
+    elif name == 'commit-summary':
+        window = _int(query, 'months', months)
+        if not 0 < window <= months:
+            raise BadRequest(f"months must be between 1 and {months}")
+        start = github_api.iso(github_api.months_ago(window))
+        commits = [c for c in data['commits'] if github_api.commit_time(c) >= start]
+        utils.plot_commit_summary_weekly(*utils.commit_summary_weekly_data(commits), output, **kwargs)
+    elif name == 'issue-type-breakdown':
+        state = _choice(query, 'state', ('all', 'open', 'closed'))
+        counter = utils.issue_type_breakdown_data(data['issues'], state, _date(query, 'since'), _date(query, 'until'))
+        utils.plot_issue_type_breakdown(counter, output, _choice(query, 'chart_type', ('pie', 'bar')), **kwargs)
+    elif name == 'pr-activity-timeline':
+        utils.plot_pr_activity_timeline(*utils.pr_activity_timeline_data(data['prs']), output, **kwargs)
+    elif name == 'issue-resolution-time':
+        times = utils.issue_resolution_time_data(data['issues'])
+        utils.plot_issue_resolution_time(times, output, _choice(query, 'chart_type', ('hist', 'box')), **kwargs)
+
+
+def _date(query, name):
+    if not query.get(name):
+        return None
+    try:
+        value = datetime.fromisoformat(query[name])
+    except ValueError:
+        raise BadRequest(f"{name} must be an ISO date, e.g. 2024-01-31")
+    # Issue timestamps are naive UTC, so aware datetimes are converted to match.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _int(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} must be a number")
+
+
+def _choice(query, name, choices):
+    value = query.get(name, choices[0])
+    if value not in choices:
+        raise BadRequest(f"{name} must be one of {', '.join(choices)}")
+    return value
+
+
+def _fingerprint(data):
+    """A cheap summary that changes whenever a refresh brings in new or updated items."""
+    return (
+        len(data['issues']), max((i.updated_at for i in data['issues']), default=None),
+        len(data['prs']), max((p.updated_at for p in data['prs']), default=None),
+        len(data['commits']), data['commits'][0].sha if data['commits'] else None,
+    )
+
+
+def serve(store, host='127.0.0.1', port=8000, dpi=None, webhook_secret=None):
+    """Load every repo, start the background refresh and serve until interrupted."""
+    store.refresh_all()
+    store.start()
+    render.pyplot()  # Import matplotlib now rather than on the first chart request.
+    server = ReportServer((host, port), store, dpi, webhook_secret)
+    store.log(f"Serving reports for {', '.join(store.repos)} on http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop()
+        server.server_close()
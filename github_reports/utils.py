@@ -1,207 +1,215 @@
-import matplotlib.pyplot as plt
+import render
+import numpy as np
 import textwrap
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+import columns
 
 
 def issue_resolution_time_data(issues):
     """Return a list of resolution times (in days) for closed issues."""
-    times = []
-    for issue in issues:
-        if issue.get('closed_at'):
-            created = datetime.strptime(issue['created_at'], '%Y-%m-%dT%H:%M:%SZ')
-            closed = datetime.strptime(issue['closed_at'], '%Y-%m-%dT%H:%M:%SZ')
-            times.append((closed - created).days + (closed - created).seconds/86400)
-    return times
-
-
-def plot_issue_resolution_time(times, output, chart_type='hist', repo_name=None): 
-    plt.figure(figsize=(10,6))
-    title = 'Issue Resolution Time Histogram' if chart_type == 'hist' else 'Issue Resolution Time Boxplot'
-    if repo_name:
-        title += f' - {repo_name}'
-    title = "\n".join(textwrap.wrap(title, width=60))
-    
-    if chart_type == 'hist':
-        plt.hist(times, bins=20, color='skyblue', edgecolor='black')
-        plt.title(title)
-        plt.xlabel('Days to Close')
-        plt.ylabel('Number of Issues')
-    else:
-        plt.boxplot(times, vert=False)
-        plt.title(title)
-        plt.xlabel('Days to Close')
-    plt.tight_layout()
-    plt.savefig(output)
+    cols, _ = columns.collect(issues, timestamps=('created_at', 'closed_at'))
+    is_closed = ~np.isnat(cols['closed_at'])
+    created = cols['created_at'][is_closed]
+    closed = cols['closed_at'][is_closed]
+    delta = columns.seconds(closed) - columns.seconds(created)
+    # Whole days plus the fractional remainder, as timedelta.days + seconds/86400 gives.
+    times = delta // columns.SECONDS_PER_DAY + (delta % columns.SECONDS_PER_DAY) / columns.SECONDS_PER_DAY
+    return times.tolist()
+
+
+def plot_issue_resolution_time(times, output, chart_type='hist', repo_name=None, dpi=None, weights=None, format=None):
+    """Plot resolution times; weights (from a rollup sketch) gives how many issues each time stands for.
+
+    Like every plot_* function, output may be a path or a file object; pass
+    format ('png', 'svg') with a file object.
+    """
+    plt = render.pyplot()
+    with render.figure(output, figsize=(10,6), dpi=dpi, format=format):
+        title = 'Issue Resolution Time Histogram' if chart_type == 'hist' else 'Issue Resolution Time Boxplot'
+        if repo_name:
+            title += f' - {repo_name}'
+        title = "\n".join(textwrap.wrap(title, width=60))
+
+        if chart_type == 'hist':
+            plt.hist(times, bins=20, weights=weights, color='skyblue', edgecolor='black')
+            plt.title(title)
+            plt.xlabel('Days to Close')
+            plt.ylabel('Number of Issues')
+        else:
+            plt.boxplot(np.repeat(times, weights) if weights is not None else times, vert=False)
+            plt.title(title)
+            plt.xlabel('Days to Close')
 
 
 def pr_activity_timeline_data(prs):
     """Return weekly counts of PRs opened, closed, and merged."""
-    opened = defaultdict(int)
-    closed = defaultdict(int)
-    merged = defaultdict(int)
-    weeks = set()
-    for pr in prs:
-        if 'created_at' in pr:
-            week = datetime.strptime(pr['created_at'], '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%W')
-            opened[week] += 1
-            weeks.add(week)
-        if pr.get('closed_at'):
-            week = datetime.strptime(pr['closed_at'], '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%W')
-            closed[week] += 1
-            weeks.add(week)
-        if pr.get('merged_at'):
-            week = datetime.strptime(pr['merged_at'], '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%W')
-            merged[week] += 1
-            weeks.add(week)
-    week_list = sorted(list(weeks))
-    opened_counts = [opened[w] for w in week_list]
-    closed_counts = [closed[w] for w in week_list]
-    merged_counts = [merged[w] for w in week_list]
+    fields = ('created_at', 'closed_at', 'merged_at')
+    cols, _ = columns.collect(prs, timestamps=fields)
+    keys = []
+    for field in fields:
+        ts = cols[field]
+        keys.append(columns.year_week_keys(ts[~np.isnat(ts)]))
+    weeks = np.unique(np.concatenate(keys))
+    opened_counts, closed_counts, merged_counts = (columns.count_by_key(k, weeks).tolist() for k in keys)
+    week_list = [columns.format_year_week(int(w)) for w in weeks]
     return week_list, opened_counts, closed_counts, merged_counts
 
 
-def plot_pr_activity_timeline(week_list, opened_counts, closed_counts, merged_counts, output, repo_name=None):
-    plt.figure(figsize=(12,7))
-    plt.plot(week_list, opened_counts, label='Opened PRs')
-    plt.plot(week_list, closed_counts, label='Closed PRs')
-    plt.plot(week_list, merged_counts, label='Merged PRs')
-    plt.xlabel('Week')
-    plt.ylabel('Count')
-    title = 'PR Activity Timeline'
-    if repo_name:
-        title += f' - {repo_name}'
-    plt.title("\n".join(textwrap.wrap(title, width=60)))
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(output)
-
-
-def issue_type_breakdown_data(issues):
-    """Return a Counter of issue labels for type breakdown."""
-    from collections import Counter
-    labels = []
-    for issue in issues:
-        labels.extend([l['name'] for l in issue.get('labels', [])])
-    return Counter(labels)
+def plot_pr_activity_timeline(week_list, opened_counts, closed_counts, merged_counts, output, repo_name=None, dpi=None, format=None):
+    plt = render.pyplot()
+    with render.figure(output, figsize=(12,7), dpi=dpi, format=format):
+        plt.plot(week_list, opened_counts, label='Opened PRs')
+        plt.plot(week_list, closed_counts, label='Closed PRs')
+        plt.plot(week_list, merged_counts, label='Merged PRs')
+        plt.xlabel('Week')
+        plt.ylabel('Count')
+        title = 'PR Activity Timeline'
+        if repo_name:
+            title += f' - {repo_name}'
+        plt.title("\n".join(textwrap.wrap(title, width=60)))
+        plt.legend()
+        plt.xticks(rotation=45)
 
 
-def plot_issue_type_breakdown(counter, output, chart_type='pie', repo_name=None):
-    plt.figure(figsize=(8,8))
-    labels = list(counter.keys())
-    counts = list(counter.values())
-    title = 'Issue Type Breakdown (by Label)'
-    if repo_name:
-        title += f' - {repo_name}'
-    title = "\n".join(textwrap.wrap(title, width=60))
+def issue_type_breakdown_data(issues, state='all', since=None, until=None):
+    """Return a Counter of issue labels for type breakdown.
 
-    if chart_type == 'pie':
-        plt.pie(counts, labels=labels, autopct='%1.1f%%', startangle=140)
-        plt.title(title)
-    else:
-        plt.bar(labels, counts)
-        plt.title(title)
-        plt.ylabel('Count')
-        plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(output)
+    state ('all', 'open' or 'closed') and since/until (creation date, whole
+    days, inclusive) match the filters of github_api.fetch_label_counts.
+    """
+    since = since.date().isoformat() if since else None
+    until = until.date().isoformat() if until else None
+    labels = []
+    for issue in issues:
+        if state != 'all' and (issue.closed_at is None) != (state == 'open'):
+            continue
+        if (since and issue.created_at[:10] < since) or (until and issue.created_at[:10] > until):
+            continue
+        labels.extend(issue.labels)
+    return Counter(labels)
 
 
-def burndown_data_from_issues(issues):
-    """Return daily open/closed issue counts for burndown chart."""
-    if not issues:
+def plot_issue_type_breakdown(counter, output, chart_type='pie', repo_name=None, dpi=None, format=None):
+    plt = render.pyplot()
+    with render.figure(output, figsize=(8,8), dpi=dpi, format=format):
+        labels = list(counter.keys())
+        counts = list(counter.values())
+        title = 'Issue Type Breakdown (by Label)'
+        if repo_name:
+            title += f' - {repo_name}'
+        title = "\n".join(textwrap.wrap(title, width=60))
+
+        if chart_type == 'pie':
+            plt.pie(counts, labels=labels, autopct='%1.1f%%', startangle=140)
+            plt.title(title)
+        else:
+            plt.bar(labels, counts)
+            plt.title(title)
+            plt.ylabel('Count')
+            plt.xticks(rotation=45)
+
+
+def burndown_data_from_issues(issues, since=None, until=None, milestone=None):
+    """Return daily open/closed issue counts for burndown chart.
+
+    since/until (naive UTC datetimes) limit the chart to a window such as a
+    sprint: issues closed before it starts or created after it ends are left
+    out. milestone limits it to the issues in the milestone with that title.
+    """
+    if milestone is not None:
+        issues = (i for i in issues if i.milestone == milestone)
+    cols, _ = columns.collect(issues, timestamps=('created_at', 'closed_at'))
+    created = cols['created_at']
+    closed = cols['closed_at']
+    keep = np.ones(len(created), dtype=bool)
+    if until is not None:
+        keep &= created <= np.datetime64(until, 's')
+    if since is not None:
+        keep &= np.isnat(closed) | (closed >= np.datetime64(since, 's'))
+    created = created[keep]
+    closed = closed[keep]
+    closed = closed[~np.isnat(closed)]
+    if not len(created):
         return [], [], []
-    created_dates = [datetime.strptime(i['created_at'], '%Y-%m-%dT%H:%M:%SZ') for i in issues]
-    closed_dates = [datetime.strptime(i['closed_at'], '%Y-%m-%dT%H:%M:%SZ') for i in issues if i.get('closed_at')]
-    start = min(created_dates)
-    end = max(created_dates + closed_dates) if closed_dates else max(created_dates)
-    days = (end - start).days + 1
+    start = since if since is not None else created.min().item()
+    if until is not None:
+        end = until
+    else:
+        end = max(created.max(), closed.max()).item() if len(closed) else created.max().item()
+    days = max((end - start).days + 1, 0)
     date_range = [start + timedelta(days=i) for i in range(days)]
-    open_counts = []
-    closed_counts = []
-    total_issues = len(issues)
-    closed_so_far = 0
-    for d in date_range:
-        closed_on_day = sum(1 for i in issues if i.get('closed_at') and datetime.strptime(i['closed_at'], '%Y-%m-%dT%H:%M:%SZ').date() == d.date())
-        closed_so_far += closed_on_day
-        open_count = total_issues - closed_so_far  # Remaining open issues
-        open_counts.append(open_count)
-        closed_counts.append(closed_on_day)
-    return date_range, open_counts, closed_counts
-
-
-def plot_burndown(date_range, open_counts, closed_counts, output, repo_name=None):
-    plt.figure(figsize=(10,6))
-    # Actual work line: remaining open issues per day
-    plt.plot(date_range, open_counts, label='Actual Work (Remaining Open Issues)', color='blue')
-
-    # Ideal line: straight line from initial total to zero
-    initial_total = open_counts[0] if open_counts else 0
-    ideal_line = [initial_total - (initial_total * i / (len(date_range)-1)) for i in range(len(date_range))] if len(date_range) > 1 else [initial_total]
-    plt.plot(date_range, ideal_line, label='Ideal (To Zero)', color='red', linestyle='dotted')
-
-    plt.xlabel('Date')
-    plt.ylabel('Remaining Issues')
-    title = 'Burndown Chart'
-    if repo_name:
-        title += f' - {repo_name}'
-    plt.title("\n".join(textwrap.wrap(title, width=60)))
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(output)
+    # Bucket closures by day once, then take a running total over the days.
+    day_index = columns.day_numbers(closed) - np.datetime64(start, 'D').astype(np.int64)
+    in_range = (day_index >= 0) & (day_index < days)
+    closed_on_day = np.bincount(day_index[in_range], minlength=days)
+    open_counts = (len(created) - np.cumsum(closed_on_day)).tolist()  # Remaining open issues
+    return date_range, open_counts, closed_on_day.tolist()
+
+
+def plot_burndown(date_range, open_counts, closed_counts, output, repo_name=None, dpi=None, format=None):
+    plt = render.pyplot()
+    with render.figure(output, figsize=(10,6), dpi=dpi, format=format):
+        # Actual work line: remaining open issues per day
+        plt.plot(date_range, open_counts, label='Actual Work (Remaining Open Issues)', color='blue')
+
+        # Ideal line: straight line from initial total to zero
+        initial_total = open_counts[0] if open_counts else 0
+        ideal_line = [initial_total - (initial_total * i / (len(date_range)-1)) for i in range(len(date_range))] if len(date_range) > 1 else [initial_total] * len(date_range)
+        plt.plot(date_range, ideal_line, label='Ideal (To Zero)', color='red', linestyle='dotted')
+
+        plt.xlabel('Date')
+        plt.ylabel('Remaining Issues')
+        title = 'Burndown Chart'
+        if repo_name:
+            title += f' - {repo_name}'
+        plt.title("\n".join(textwrap.wrap(title, width=60)))
+        plt.legend()
 
 
 def commit_summary_weekly_data(commits):
     """Return weekly commit counts per user as a dict: {user: [week1, week2, ...]} and week labels."""
-    from collections import defaultdict
-    if not commits:
+    cols, uniques = columns.collect(commits, timestamps=('author_date',), factors=('author_name',))
+    has_date = ~np.isnat(cols['author_date'])
+    if not has_date.any():
         return {}, []
-    # Find date range
-    dates = [datetime.strptime(c['commit']['author']['date'], '%Y-%m-%dT%H:%M:%SZ') for c in commits if c.get('commit') and c['commit'].get('author')]
-    if not dates:
-        return {}, []
-    start = min(dates)
-    end = max(dates)
-    # Build week bins
-    week_starts = []
-    current = start - timedelta(days=start.weekday())  # start from Monday
-    while current <= end:
-        week_starts.append(current)
-        current += timedelta(days=7)
-    week_labels = [ws.strftime('%Y-%m-%d') for ws in week_starts]
-    user_week_counts = defaultdict(lambda: [0]*len(week_starts))
-    for c in commits:
-        if not (c.get('commit') and c['commit'].get('author')):
-            continue
-        author = c['commit']['author']['name']
-        date = datetime.strptime(c['commit']['author']['date'], '%Y-%m-%dT%H:%M:%SZ')
-        for i, ws in enumerate(week_starts):
-            we = ws + timedelta(days=7)
-            if ws <= date < we:
-                user_week_counts[author][i] += 1
-                break
+    dates = columns.seconds(cols['author_date'][has_date])
+    codes = cols['author_name'][has_date]
+    # Renumber authors by first appearance among the dated commits.
+    used, first_seen = np.unique(codes, return_index=True)
+    order = used[np.argsort(first_seen)]
+    renumber = np.empty(len(uniques['author_name']), dtype=np.int64)
+    renumber[order] = np.arange(len(order))
+    codes = renumber[codes]
+    authors = [uniques['author_name'][i] for i in order]
+    # Weeks run Monday to Monday, starting at the time of day of the first commit.
+    start = int(dates.min())
+    first_week = start - int(columns.weekdays(np.array([start], dtype='datetime64[s]'))[0]) * columns.SECONDS_PER_DAY
+    week_index = (dates - first_week) // columns.SECONDS_PER_WEEK
+    n_weeks = int(week_index.max()) + 1
+    week_starts = datetime.fromtimestamp(first_week, timezone.utc).replace(tzinfo=None)
+    week_labels = [(week_starts + timedelta(days=7 * i)).strftime('%Y-%m-%d') for i in range(n_weeks)]
+    counts = np.bincount(codes * n_weeks + week_index, minlength=len(authors) * n_weeks).reshape(len(authors), n_weeks)
+    user_week_counts = {author: row.tolist() for author, row in zip(authors, counts)}
     return user_week_counts, week_labels
 
 
-def plot_commit_summary_weekly(user_week_counts, week_labels, output, repo_name=None):
-    import numpy as np
+def plot_commit_summary_weekly(user_week_counts, week_labels, output, repo_name=None, dpi=None, format=None):
+    plt = render.pyplot()
     users = list(user_week_counts.keys())
     weeks = len(week_labels)
     x = np.arange(weeks)
-    plt.figure(figsize=(12,7))
-    bottom = np.zeros(weeks)
-    for user in users:
-        counts = user_week_counts[user]
-        plt.bar(x, counts, bottom=bottom, label=user)
-        bottom += np.array(counts)
-    plt.xlabel('Week Starting')
-    plt.ylabel('Commits')
-    title = 'Weekly Commit Summary per User'
-    if repo_name:
-        title += f' - {repo_name}'
-    plt.title("\n".join(textwrap.wrap(title, width=60)))
-    plt.xticks(x, week_labels, rotation=45)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(output)
+    with render.figure(output, figsize=(12,7), dpi=dpi, format=format):
+        bottom = np.zeros(weeks)
+        for user in users:
+            counts = user_week_counts[user]
+            plt.bar(x, counts, bottom=bottom, label=user)
+            bottom += np.array(counts)
+        plt.xlabel('Week Starting')
+        plt.ylabel('Commits')
+        title = 'Weekly Commit Summary per User'
+        if repo_name:
+            title += f' - {repo_name}'
+        plt.title("\n".join(textwrap.wrap(title, width=60)))
+        plt.xticks(x, week_labels, rotation=45)
+        plt.legend()
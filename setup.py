@@ -7,6 +7,7 @@ setup(
     install_requires=[
         'requests',
         'matplotlib',
+        'numpy',
         'click',
     ],
     entry_points={
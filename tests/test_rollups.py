@@ -0,0 +1,135 @@
+"""The rollups must give the same report data as the raw items, through edits and lost cache entries."""
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'github_reports'))
+
+import cache_utils  # noqa: E402
+import github_api  # noqa: E402
+import records  # noqa: E402
+import rollups  # noqa: E402
+import utils  # noqa: E402
+
+REPO = 'owner/repo'
+LABELS = ('bug', 'enhancement', 'docs', 'question')
+
+
+class FakeRepo:
+    """Issues and pull requests edited over time, listed like the since= endpoints list them."""
+
+    def __init__(self, seed=0, size=150):
+        self.rng = random.Random(seed)
+        self.clock = datetime(2024, 1, 1)
+        self.issues = {}
+        self.prs = {}
+        for _ in range(size):
+            self.open_issue()
+            self.open_pull_request()
+
+    def tick(self):
+        # Some edits share a timestamp, as they do at the since= boundary.
+        self.clock += timedelta(minutes=self.rng.choice((0, 0, 7, 90, 600)))
+        return self.clock.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def open_issue(self):
+        now = self.tick()
+        labels = tuple(self.rng.sample(LABELS, self.rng.randint(0, 2)))
+        issue = records.Issue(len(self.issues) + 1, now, now, None, labels, None)
+        self.issues[issue.id] = issue
+
+    def open_pull_request(self):
+        now = self.tick()
+        pr = records.PullRequest(len(self.prs) + 1, now, now, None, None)
+        self.prs[pr.id] = pr
+
+    def edit(self, count=40):
+        """Open, close, reopen and relabel issues and close or merge pull requests."""
+        for _ in range(count):
+            action = self.rng.choice(('open', 'close', 'reopen', 'relabel', 'pr'))
+            if action == 'open':
+                self.open_issue()
+                self.open_pull_request()
+                continue
+            now = self.tick()
+            if action == 'pr':
+                pr = self.prs[self.rng.randint(1, len(self.prs))]
+                merged = now if self.rng.random() < 0.5 else None
+                self.prs[pr.id] = records.PullRequest(pr.id, pr.created_at, now, now, merged)
+                continue
+            issue = self.issues[self.rng.randint(1, len(self.issues))]
+            closed_at, labels = issue.closed_at, issue.labels
+            if action == 'close':
+                closed_at = now
+            elif action == 'reopen':
+                closed_at = None
+            else:
+                labels = tuple(self.rng.sample(LABELS, self.rng.randint(0, 3)))
+            self.issues[issue.id] = records.Issue(issue.id, issue.created_at, now, closed_at, labels, None)
+
+    def issues_updated_since(self, repo, token, since=None):
+        return [i for i in self.issues.values() if since is None or i.updated_at >= since]
+
+    def pull_requests_updated_since(self, repo, token, since=None, state='all'):
+        return [p for p in self.prs.values() if since is None or p.updated_at >= since]
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    cache_utils.configure_cache(str(tmp_path / 'cache.sqlite3'))
+    repo = FakeRepo()
+    monkeypatch.setattr(github_api, 'fetch_issues_updated_since', repo.issues_updated_since)
+    monkeypatch.setattr(github_api, 'fetch_pull_requests_updated_since', repo.pull_requests_updated_since)
+    return repo
+
+
+def assert_matches(fake):
+    issues, prs = list(fake.issues.values()), list(fake.prs.values())
+    rollup = rollups.issue_rollup(REPO, 'token')
+    for state in ('all', 'open', 'closed'):
+        assert rollups.issue_type_breakdown_data(rollup, state) == utils.issue_type_breakdown_data(issues, state)
+    since = datetime(2024, 1, 1)
+    until = fake.clock.replace(hour=0, minute=0, second=0) + timedelta(days=1)
+    expected = utils.burndown_data_from_issues(issues, since, until)
+    assert [list(part) for part in rollups.burndown_data(rollup, since, until)] == [list(part) for part in expected]
+    _, weights = rollups.issue_resolution_time_data(rollup)
+    assert sum(weights) == len(utils.issue_resolution_time_data(issues))
+    pr_rollup = rollups.pull_request_rollup(REPO, 'token')
+    assert [list(part) for part in rollups.pr_activity_timeline_data(pr_rollup)] == \
+        [list(part) for part in utils.pr_activity_timeline_data(prs)]
+
+
+def delete_entry(kind, page):
+    cache_utils._connection().execute("DELETE FROM entries WHERE repo = ? AND kind = ? AND page = ?", (REPO, kind, page))
+
+
+def test_rollups_follow_edits(fake):
+    assert_matches(fake)
+    for _ in range(5):
+        fake.edit()
+        assert_matches(fake)
+
+
+@pytest.mark.parametrize('page', ['', 'ledger'])
+def test_rollups_rebuild_after_losing_an_entry(fake, page):
+    assert_matches(fake)
+    fake.edit()
+    assert_matches(fake)
+    for kind in ('rollup:issues', 'rollup:pulls'):
+        delete_entry(kind, page)
+    assert_matches(fake)
+    fake.edit()
+    assert_matches(fake)
+
+
+def test_rollups_rebuild_with_a_ledger_of_another_generation(fake):
+    assert_matches(fake)
+    stale = cache_utils.load_cache(REPO, 'rollup:issues', 'ledger', max_age_seconds=None)
+    fake.edit()
+    assert_matches(fake)
+    cache_utils.save_cache(REPO, 'rollup:issues', stale, 'ledger', pinned=True)
+    fake.edit()
+    assert_matches(fake)